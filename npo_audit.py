@@ -1,9 +1,43 @@
 # npo_audit.py
 import logging
+import time
 import json
+from collections import deque
+from itertools import islice
 from datetime import datetime
 import os
 
+try:
+    import orjson
+    
+    def _dumps(obj):
+        """Serialize a log entry with orjson's C encoder"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+except ImportError:
+    def _dumps(obj):
+        """Serialize a log entry with the stdlib encoder"""
+        return json.dumps(obj)
+
+# File handlers shared by every AuditLogger writing to the same file
+_audit_handlers = {}
+
+# Month suffix for the audit log file, fixed for the lifetime of the process
+_LOG_MONTH = datetime.now().strftime('%Y%m')
+
+# Entries logged within the same ~1 ms window (2**20 ns) share one timestamp string
+_TIMESTAMP_SHIFT = 20
+_ts_bucket = None
+_ts_iso = None
+
+def _now_iso():
+    """Return the current ISO timestamp, reused for bursts of log calls"""
+    global _ts_bucket, _ts_iso
+    bucket = time.monotonic_ns() >> _TIMESTAMP_SHIFT
+    if bucket != _ts_bucket:
+        _ts_bucket = bucket
+        _ts_iso = datetime.now().isoformat()
+    return _ts_iso
+
 class AuditLogger:
     """Handle audit logging for the application"""
     
@@ -14,76 +48,88 @@ class AuditLogger:
     def setup_logging(self):
         """Setup logging configuration"""
         # Create log directory if it doesn't exist
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
+        os.makedirs(self.log_dir, exist_ok=True)
         
         # Configure logging
-        log_file = os.path.join(self.log_dir, f"npo_audit_{datetime.now().strftime('%Y%m')}.log")
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
-        
+        self.log_file = os.path.join(self.log_dir, f"npo_audit_{_LOG_MONTH}.log")
         self.logger = logging.getLogger('NPOLogger')
+        self.logger.setLevel(logging.INFO)
+        
+        # Only build the handler once per log file; later instances reuse it
+        self.handler = _audit_handlers.get(self.log_file)
+        if self.handler is None:
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            
+            # Written through on every record: the audit trail has to survive a crash or kill.
+            # UTF-8 because orjson emits raw non-ASCII text (₹, Gujarati) that cp1252 cannot encode
+            self.handler = logging.FileHandler(self.log_file, encoding='utf-8')
+            self.handler.setFormatter(formatter)
+            self.logger.addHandler(self.handler)
+            _audit_handlers[self.log_file] = self.handler
+            
+            # A single console handler for the logger, however many log files it writes to
+            if not any(type(h) is logging.StreamHandler for h in self.logger.handlers):
+                stream_handler = logging.StreamHandler()
+                stream_handler.setFormatter(formatter)
+                self.logger.addHandler(stream_handler)
+    
+    def flush(self):
+        """Flush the log file to disk"""
+        self.handler.flush()
     
     def log_generation(self, user_info, filename, parameters):
         """Log report generation"""
         log_entry = {
             'event': 'report_generation',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'user': user_info,
             'filename': filename,
             'parameters': parameters,
             'status': 'success'
         }
         
-        self.logger.info(json.dumps(log_entry))
+        self.logger.info(_dumps(log_entry))
         return log_entry
     
     def log_validation(self, data_hash, validation_result, unit=None):
         """Log data validation"""
         log_entry = {
             'event': 'data_validation',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'data_hash': data_hash,
             'validation_result': validation_result,
             'unit': unit,
             'status': 'valid' if validation_result[0] else 'invalid'
         }
         
-        self.logger.info(json.dumps(log_entry))
+        self.logger.info(_dumps(log_entry))
         return log_entry
     
     def log_error(self, error_type, error_message, context=None):
         """Log errors"""
         log_entry = {
             'event': 'error',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'error_type': error_type,
             'error_message': error_message,
             'context': context,
             'status': 'error'
         }
         
-        self.logger.error(json.dumps(log_entry))
+        self.logger.error(_dumps(log_entry))
         return log_entry
     
     def log_compliance_check(self, compliance_type, results):
         """Log compliance checks"""
         log_entry = {
             'event': 'compliance_check',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'compliance_type': compliance_type,
             'results': results,
             'status': 'completed'
         }
         
-        self.logger.info(json.dumps(log_entry))
+        self.logger.info(_dumps(log_entry))
         return log_entry
     
     def get_audit_trail(self, start_date=None, end_date=None):
@@ -98,17 +144,17 @@ class AuditLogger:
     def export_audit_log(self, output_file):
         """Export audit log to file"""
         try:
-            # Collect all log entries (simplified)
-            logs = []
-            for handler in self.logger.handlers:
-                if isinstance(handler, logging.FileHandler):
-                    log_file = handler.baseFilename
-                    if os.path.exists(log_file):
-                        with open(log_file, 'r') as f:
-                            logs.extend(f.readlines())
-            
-            with open(output_file, 'w') as f:
-                json.dump({'audit_logs': logs}, f, indent=2)
+            self.flush()
+            # Stream log lines straight into the JSON array instead of loading the file
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as out:
+                out.write('{"audit_logs": [')
+                if os.path.exists(self.log_file):
+                    with open(self.log_file, 'r', encoding='utf-8', errors='replace') as f:
+                        for i, line in enumerate(f):
+                            if i:
+                                out.write(', ')
+                            out.write(_dumps(line))
+                out.write(']}')
             
             return True, output_file
         except Exception as e:
@@ -117,13 +163,14 @@ class AuditLogger:
 class UserActivityTracker:
     """Track user activities"""
     
-    def __init__(self):
-        self.activities = []
+    def __init__(self, max_activities=10000):
+        # Bounded: once full, each new activity drops the oldest
+        self.activities = deque(maxlen=max_activities)
     
     def track_activity(self, activity_type, details):
         """Track user activity"""
         activity = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'activity_type': activity_type,
             'details': details
         }
@@ -132,8 +179,9 @@ class UserActivityTracker:
     
     def get_recent_activities(self, limit=50):
         """Get recent activities"""
-        return self.activities[-limit:] if self.activities else []
+        start = max(len(self.activities) - limit, 0)
+        return list(islice(self.activities, start, None))
     
     def clear_activities(self):
         """Clear activity log"""
-        self.activities = []
\ No newline at end of file
+        self.activities.clear()
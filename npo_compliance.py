@@ -1,6 +1,25 @@
 # npo_compliance.py (REPLACE ENTIRE FILE)
+from collections import Counter, defaultdict
 from datetime import datetime
-import pandas as pd
+from numbers import Number
+import numpy as np
+from npo_config import REQUIRED_GUJ_GROUPS, PL_INCOME_SET, PL_EXPENSE_SET
+
+def _to_amount(value):
+    """Coerce a ledger amount (number or formatted string) to float"""
+    if isinstance(value, Number):
+        return value
+    try:
+        return float(str(value).replace(',', '').strip())
+    except ValueError:
+        return 0.0
+
+def _aggregate(amounts, codes, is_income, is_expense, programme_code):
+    """Income, expense and programme-expense totals from boolean masks over the group codes"""
+    income = is_income[codes]
+    expense = is_expense[codes] & ~income
+    return (float(amounts[income].sum()), float(amounts[expense].sum()),
+            float(amounts[expense & (codes == programme_code)].sum()))
 
 class ComplianceCalculator:
     """Calculate various compliance requirements for NPOs"""
@@ -8,7 +27,8 @@ class ComplianceCalculator:
     @staticmethod
     def calculate_section_11_compliance(income, expenses, capital_exp=0, accumulation_rate=0.15):
         """Advanced Section 11 compliance with Deemed Application logic"""
-        revenue_expenses = sum(expenses)
+        # Callers with a single expense total can pass it directly instead of a list
+        revenue_expenses = expenses if isinstance(expenses, Number) else sum(expenses)
         total_application = revenue_expenses + capital_exp
         required_application = income * 0.85
         max_accumulation = income * accumulation_rate
@@ -34,22 +54,89 @@ class ComplianceCalculator:
         return compliance_status
     
     @staticmethod
-    def check_fcra_compliance(data):
+    def _index_frame(df):
+        """_index_ledgers for a DataFrame: group codes are factorized once and totalled by _aggregate"""
+        import pandas as pd
+        
+        n = len(df)
+        groups = df['Group_Head'] if 'Group_Head' in df.columns else pd.Series([None] * n, index=df.index)
+        codes, uniques = pd.factorize(groups)
+        # One extra False slot so the -1 code of blank groups looks up as neither income nor expense
+        is_income = np.append(np.fromiter((g in PL_INCOME_SET for g in uniques), dtype=bool, count=len(uniques)), False)
+        is_expense = np.append(np.fromiter((g in PL_EXPENSE_SET for g in uniques), dtype=bool, count=len(uniques)), False)
+        programme = np.flatnonzero(np.asarray(uniques, dtype=object) == 'Programme Expenses')
+        
+        amounts = df['Amount_CY'] if 'Amount_CY' in df.columns else pd.Series(0.0, index=df.index)
+        if not pd.api.types.is_numeric_dtype(amounts):
+            amounts = pd.to_numeric(amounts.astype(str).str.replace(',', '', regex=False).str.strip(), errors='coerce')
+        income, expense, programme_expense = _aggregate(
+            amounts.fillna(0).to_numpy(dtype=np.float64), codes.astype(np.int64), is_income, is_expense,
+            int(programme[0]) if len(programme) else -2)
+        
+        return {
+            'by_group': groups.groupby(groups, sort=False).indices if n else {},
+            'source_counts': Counter(df['Source'].tolist() if 'Source' in df.columns else [None] * n),
+            'totals': {'income': float(income), 'expense': float(expense), 'program_expense': float(programme_expense)}
+        }
+    
+    @staticmethod
+    def _index_ledgers(data):
+        """Index ledger rows by Group_Head, count them by Source and total income/expense in a single pass"""
+        if hasattr(data, 'columns'):
+            return ComplianceCalculator._index_frame(data)
+        by_group = defaultdict(list)
+        source_counts = Counter()
+        totals = {'income': 0.0, 'expense': 0.0, 'program_expense': 0.0}
+        for r in data:
+            gh = r.get('Group_Head')
+            by_group[gh].append(r)
+            source_counts[r.get('Source')] += 1
+            if gh in PL_INCOME_SET:
+                totals['income'] += _to_amount(r.get('Amount_CY', 0))
+            elif gh in PL_EXPENSE_SET:
+                amount = _to_amount(r.get('Amount_CY', 0))
+                totals['expense'] += amount
+                if gh == 'Programme Expenses':
+                    totals['program_expense'] += amount
+        return {'by_group': by_group, 'source_counts': source_counts, 'totals': totals}
+    
+    @staticmethod
+    def check_fcra_compliance(data, index=None):
         """Verify Foreign Contribution (FCRA) segregation"""
-        fcra_data = [r for r in data if r.get('Source') == 'FCRA']
-        local_data = [r for r in data if r.get('Source') == 'Local']
+        # Tally every source bucket in one pass instead of one list per source
+        if index is None:
+            index = ComplianceCalculator._index_ledgers(data)
+        source_counts = index['source_counts']
+        fcra_count = source_counts['FCRA']
         
         return {
-            'has_fcra': len(fcra_data) > 0,
-            'fcra_ledger_count': len(fcra_data),
-            'local_ledger_count': len(local_data),
-            'is_segregated': True if len(fcra_data) > 0 else "N/A"
+            'has_fcra': fcra_count > 0,
+            'fcra_ledger_count': fcra_count,
+            'local_ledger_count': source_counts['Local'],
+            'is_segregated': True if fcra_count > 0 else "N/A"
         }
 
     @staticmethod
-    def generate_compliance_report(data, income_total, expense_total, ppe_data=None):
-        # Import here to avoid circular import
-        from npo_data import DataManager
+    def _ppe_additions_total(ppe_data):
+        """Sum PPE additions with one vectorized reduction over the column"""
+        # Imported lazily so loading the compliance module does not pull in pandas
+        import pandas as pd
+        
+        ppe_df = ppe_data if isinstance(ppe_data, pd.DataFrame) else pd.DataFrame(list(ppe_data))
+        if ppe_df.empty or 'Additions' not in ppe_df.columns:
+            return 0
+        additions = ppe_df['Additions'].astype(str).str.replace(',', '', regex=False).str.strip()
+        return float(pd.to_numeric(additions, errors='coerce').fillna(0).to_numpy().sum())
+    
+    @staticmethod
+    def generate_compliance_report(data, income_total=None, expense_total=None, ppe_data=None):
+        """Build the full compliance report; income/expense totals default to the ledger sums"""
+        # Shared by every ledger check below so data is only walked once
+        index = ComplianceCalculator._index_ledgers(data)
+        if income_total is None:
+            income_total = index['totals']['income']
+        if expense_total is None:
+            expense_total = index['totals']['expense']
         
         report = {
             'generated_at': datetime.now().isoformat(),
@@ -60,12 +147,12 @@ class ComplianceCalculator:
                 'surplus_deficit': income_total - expense_total
             },
             'section_11': ComplianceCalculator.calculate_section_11_compliance(
-                income_total, [expense_total], 
-                sum(DataManager._safe_float(p.get('Additions', 0)) for p in ppe_data) if ppe_data else 0
+                income_total, expense_total,
+                ComplianceCalculator._ppe_additions_total(ppe_data) if ppe_data is not None and len(ppe_data) else 0
             ),
-            'fcra_compliance': ComplianceCalculator.check_fcra_compliance(data),
+            'fcra_compliance': ComplianceCalculator.check_fcra_compliance(data, index),
             'gujarat_compliance': {
-                'issues': ComplianceCalculator.check_gujarat_compliance(data, ppe_data),
+                'issues': ComplianceCalculator.check_gujarat_compliance(data, ppe_data, index),
                 'forms_required': ['Form 10', 'Form 11', 'Form 12']
             },
             'ica_compliance': {
@@ -76,13 +163,13 @@ class ComplianceCalculator:
         return report
 
     @staticmethod
-    def check_gujarat_compliance(data, ppe_data=None):
-        compliance_items = []
-        required_groups = ['Corpus Fund', 'Restricted Funds', 'Property, Plant & Equipment']
-        for group in required_groups:
-            if not any(r.get('Group_Head') == group for r in data):
-                compliance_items.append(f"Missing required group: {group}")
-        return compliance_items
+    def check_gujarat_compliance(data, ppe_data=None, index=None):
+        # Collect present groups in one pass instead of scanning data per group
+        if index is None:
+            index = ComplianceCalculator._index_ledgers(data)
+        seen_groups = index['by_group']
+        return [f"Missing required group: {group}" for group in REQUIRED_GUJ_GROUPS
+                if group not in seen_groups]
 
 class ITFormsGenerator:
     """Generate Income Tax Forms 10B/10BB"""
@@ -1,6 +1,12 @@
 # npo_config.py
 import json
 from datetime import datetime
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # ==========================================
 # CONFIGURATION
@@ -46,6 +52,12 @@ PL_EXPENSE = [
 ]
 
 ALL_GROUPS = sorted(BS_LIABILITIES + BS_ASSETS + PL_INCOME + PL_EXPENSE)
+# Frozen views for membership tests in per-ledger loops
+PL_INCOME_SET = frozenset(PL_INCOME)
+PL_EXPENSE_SET = frozenset(PL_EXPENSE)
+BS_ASSETS_SET = frozenset(BS_ASSETS)
+BS_LIABILITIES_SET = frozenset(BS_LIABILITIES)
+ALL_GROUPS_SET = frozenset(ALL_GROUPS)
 FUND_TYPES = ['General', 'Designated', 'Restricted', 'Corpus']
 SOURCE_TYPES = ['Local', 'FCRA']
 
@@ -102,6 +114,23 @@ GUJ_IE_INC_MAP = {
     'By Income from other sources': ['Other Income', 'Fees / Subscriptions', 'Sale of Goods']
 }
 
+def _reverse_map(display_map):
+    """Invert a {display line: [groups]} map into a read-only {group: (display lines)} map"""
+    reverse = {}
+    for display, groups in display_map.items():
+        for g in groups:
+            reverse.setdefault(g, []).append(display)
+    return MappingProxyType({g: tuple(lines) for g, lines in reverse.items()})
+
+# Group -> Gujarat line lookups, built once at import
+GUJ_BS_ASSETS_REV = _reverse_map(GUJ_BS_ASSETS_MAP)
+GUJ_BS_LIAB_REV = _reverse_map(GUJ_BS_LIAB_MAP)
+GUJ_IE_EXP_REV = _reverse_map(GUJ_IE_EXP_MAP)
+GUJ_IE_INC_REV = _reverse_map(GUJ_IE_INC_MAP)
+
+# Groups every Gujarat trust balance sheet must carry (ordered for reporting)
+REQUIRED_GUJ_GROUPS = ('Corpus Fund', 'Restricted Funds', 'Property, Plant & Equipment')
+
 # --- GUJARAT FORMS AND SCHEDULES ---
 GUJ_FORMS = {
     'Form 10': 'Annual Statement of Accounts',
@@ -184,19 +213,26 @@ COMPLIANCE_CHECKLISTS = {
 
 def save_config(config_data, filename='npo_config_backup.json'):
     try:
-        with open(filename, 'w') as f:
-            json.dump({
-                'saved_at': datetime.now().isoformat(),
-                'config': config_data
-            }, f, indent=2)
+        payload = {
+            'saved_at': datetime.now().isoformat(),
+            'config': config_data
+        }
+        # Encode compactly in one go and hand the file a single write
+        if orjson is not None:
+            encoded = orjson.dumps(payload)
+        else:
+            encoded = json.dumps(payload, separators=(',', ':')).encode()
+        with open(filename, 'wb') as f:
+            f.write(encoded)
         return True
     except Exception as e:
         return False, str(e)
 
 def load_config(filename='npo_config_backup.json'):
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         return data['config']
     except FileNotFoundError:
         return None
@@ -1,8 +1,41 @@
 # npo_data.py
 import pandas as pd
+import numpy as np
 import hashlib
 import json
+import os
+import re
+from collections import namedtuple
+from contextlib import closing
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    import pyarrow  # noqa: F401  (enables pandas' multi-threaded CSV engine)
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Rows parsed per read_csv chunk; bounds peak memory on very large trial balances
+_CSV_CHUNK_ROWS = 100_000
+# Files up to this size are parsed whole by the pyarrow engine; larger ones stream in chunks
+_PYARROW_MAX_BYTES = 64 << 20
+
+# Header rules for TB column detection, compiled once (applied to lower-cased names)
+_NAME_RE = re.compile(r'ledger|particular|head')
+_AMOUNT_RE = re.compile(r'amount|debit|balance|rs')
+_PY_RE = re.compile(r'prev|py')
+_CY_RE = re.compile(r'curr|cy')
+_UNIT_RE = re.compile(r'unit|branch')
+_GROUP_RE = re.compile(r'(?!.*sub).*group', re.S)  # use with match(): 'group' without 'sub'
+_SUBGROUP_RE = re.compile(r'sub.*group|group.*sub', re.S)
+_FUND_TYPE_RE = re.compile(r'fund.*type|type.*fund', re.S)
+
+# Source column resolved for each TB field (None when the file lacks it)
+ColumnPlan = namedtuple('ColumnPlan', ['name', 'cy', 'py', 'unit', 'group', 'sub', 'fund'])
+
+# Parsed trial balances keyed by (path, mtime, size) so re-importing an unchanged file skips parsing
+_tb_cache = {}
 
 class DataStore:
     """Centralized Store for Application State to ensure data integrity"""
@@ -23,77 +56,144 @@ class DataStore:
 
 class DataManager:
     @staticmethod
-    def load_tb(file_path):
+    def load_tb(file_path, use_cache=True):
         """Load trial balance with validation"""
         try:
-            df = pd.read_csv(file_path)
-            cols = {c.lower().strip(): c for c in df.columns}
-            
-            # Detect Columns
-            name_col = next((cols[c] for c in cols if any(x in c for x in ['ledger', 'particular', 'head'])), None)
-            amt_candidates = [c for c in cols if any(x in c for x in ['amount', 'debit', 'balance', 'rs'])]
-            
-            cy_col = None; py_col = None
-            for c in amt_candidates:
-                if 'prev' in c.lower() or 'py' in c.lower(): py_col = cols[c]
-                elif 'curr' in c.lower() or 'cy' in c.lower(): cy_col = cols[c]
-            
-            if not cy_col and len(amt_candidates) > 0: cy_col = cols[amt_candidates[0]]
-            if not py_col and len(amt_candidates) > 1: py_col = cols[amt_candidates[1]]
-
-            unit_col = next((cols[c] for c in cols if 'unit' in c or 'branch' in c), None)
-
-            if not name_col or not cy_col: 
-                return None, "Could not identify Ledger/Amount columns."
-
-            # Validate data
-            validation_result = DataManager._validate_dataframe(df, name_col, cy_col, py_col)
-            if not validation_result[0]:
-                return None, validation_result[1]
-
-            processed_data = []
-            for _, row in df.iterrows():
-                row_data = {
-                    'Unit': row[unit_col] if unit_col else 'Main Unit',
-                    'Ledger Name': str(row[name_col]).strip(),
-                    'Amount_CY': DataManager._safe_float(row[cy_col]) if cy_col else 0,
-                    'Amount_PY': DataManager._safe_float(row[py_col]) if py_col else 0,
-                    'Group_Head': '', 'Sub_Group': '', 'L3_Group': '', 'Fund_Type': 'General', 'Source': 'Local'
-                }
-                # Auto-Map
-                for c in df.columns:
-                    cl = c.lower()
-                    if 'group' in cl and 'sub' not in cl and cl not in ['subgroup', 'sub_group']: 
-                        row_data['Group_Head'] = str(row[c]).strip()
-                    if 'sub' in cl and 'group' in cl: 
-                        row_data['Sub_Group'] = str(row[c]).strip()
-                    if 'fund' in cl and 'type' in cl: 
-                        row_data['Fund_Type'] = str(row[c]).strip()
-                processed_data.append(row_data)
+            stat = os.stat(file_path)
+            cache_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+            if use_cache and cache_key in _tb_cache:
+                return [dict(r) for r in _tb_cache[cache_key]], None
+
+            # Columns are detected and validated on the first frame
+            with closing(DataManager._iter_csv_frames(file_path)) as reader:
+                df = next(reader)
+                plan = DataManager._detect_columns(tuple(df.columns))
+
+                if not plan.name or not plan.cy: 
+                    return None, "Could not identify Ledger/Amount columns."
+
+                # Validate data
+                is_valid, message, cy_numeric, py_numeric = DataManager._validate_dataframe(df, plan.name, plan.cy, plan.py)
+                if not is_valid:
+                    return None, message
+
+                processed_data = DataManager._records_from_frame(df, plan, cy_numeric, py_numeric)
+                for chunk in reader:
+                    processed_data.extend(DataManager._records_from_frame(chunk, plan))
             
+            if use_cache:
+                _tb_cache.clear()  # only the latest file is worth keeping
+                _tb_cache[cache_key] = [dict(r) for r in processed_data]
             return processed_data, None
         except Exception as e: 
             return None, f"Error loading file: {str(e)}"
 
+    @staticmethod
+    def _iter_csv_frames(file_path):
+        """Yield the TB as DataFrames: whole-file via the pyarrow engine for smaller files, else bounded chunks"""
+        if _HAS_PYARROW and os.path.getsize(file_path) <= _PYARROW_MAX_BYTES:
+            # pyarrow parses on all cores but cannot stream, so only files that fit comfortably go whole
+            yield pd.read_csv(file_path, engine='pyarrow')
+            return
+        with pd.read_csv(file_path, chunksize=_CSV_CHUNK_ROWS) as reader:
+            yield from reader
+
+    @staticmethod
+    def _records_from_frame(df, plan, cy_numeric=None, py_numeric=None):
+        """Build TB records for one chunk, one vectorized step per output column"""
+        n = len(df)
+        def text(col, default):
+            # Blank cells fall back to the field default rather than the string 'nan'
+            if not col:
+                return [default] * n
+            return df[col].fillna(default).astype(str).str.strip().tolist()
+
+        if cy_numeric is None:
+            cy_numeric = DataManager._safe_float_series(df[plan.cy])
+        if py_numeric is None and plan.py:
+            py_numeric = DataManager._safe_float_series(df[plan.py])
+
+        units = df[plan.unit].tolist() if plan.unit else ['Main Unit'] * n
+        names = text(plan.name, '')
+        cy_vals = cy_numeric.tolist()
+        py_vals = py_numeric.tolist() if py_numeric is not None else [0] * n
+        groups = text(plan.group, '')
+        subs = text(plan.sub, '')
+        funds = text(plan.fund, 'General')
+
+        return [
+            {
+                'Unit': u, 'Ledger Name': name, 'Amount_CY': cy, 'Amount_PY': py,
+                'Group_Head': g, 'Sub_Group': sg, 'L3_Group': '', 'Fund_Type': f, 'Source': 'Local'
+            }
+            for u, name, cy, py, g, sg, f in zip(units, names, cy_vals, py_vals, groups, subs, funds)
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _detect_columns(columns):
+        """Map a header tuple to a ColumnPlan; memoized since users reload the same layouts"""
+        cols = {c.lower().strip(): c for c in columns}
+        
+        # Detect Columns
+        name_col = next((cols[c] for c in cols if _NAME_RE.search(c)), None)
+        amt_candidates = [c for c in cols if _AMOUNT_RE.search(c)]
+        
+        cy_col = None; py_col = None
+        for c in amt_candidates:  # keys of cols are already lower-cased
+            if _PY_RE.search(c): py_col = cols[c]
+            elif _CY_RE.search(c): cy_col = cols[c]
+        
+        if not cy_col and len(amt_candidates) > 0: cy_col = cols[amt_candidates[0]]
+        if not py_col and len(amt_candidates) > 1: py_col = cols[amt_candidates[1]]
+
+        unit_col = next((cols[c] for c in cols if _UNIT_RE.search(c)), None)
+        group_col, sub_col, fund_col = DataManager._detect_mapping_columns(columns)
+        return ColumnPlan(name_col, cy_col, py_col, unit_col, group_col, sub_col, fund_col)
+
+    @staticmethod
+    def _detect_mapping_columns(columns):
+        """Resolve the Group/Sub-Group/Fund-Type columns in one scan; the last matching column wins"""
+        group_col = sub_col = fund_col = None
+        for c in columns:
+            cl = c.lower()
+            if _GROUP_RE.match(cl): group_col = c
+            if _SUBGROUP_RE.search(cl): sub_col = c
+            if _FUND_TYPE_RE.search(cl): fund_col = c
+        return group_col, sub_col, fund_col
+
     @staticmethod
     def calculate_wdv_depreciation(ppe_records):
         """Automated Depreciation Engine using Income Tax Act rates"""
         from npo_config import DEPRECIATION_RATES
-        for record in ppe_records:
-            asset_name = str(record.get('Asset Name', ''))
-            # Auto-detect rate from name or config
-            rate = 0.15 # Default
-            for category, r in DEPRECIATION_RATES.items():
-                if category.lower() in asset_name.lower():
-                    rate = r
-                    break
-            
-            opening = DataManager._safe_float(record.get('Gross_Op', 0))
-            additions = DataManager._safe_float(record.get('Additions', 0))
-            deletions = DataManager._safe_float(record.get('Deletions', 0))
-            
-            # WDV Calculation: (Opening + Additions - Deletions) * Rate
-            record['Dep_Year'] = round((opening + additions - deletions) * rate, 2)
+        if not ppe_records:
+            return ppe_records
+
+        frame = pd.DataFrame(list(ppe_records))
+        
+        # Auto-detect rate from name: one vectorized substring test per category.
+        # Applied in reverse so the first matching category in DEPRECIATION_RATES wins.
+        if 'Asset Name' in frame.columns:
+            names = frame['Asset Name'].fillna('').astype(str).str.lower()
+        else:
+            names = pd.Series('', index=frame.index)
+        rates = np.full(len(frame), 0.15) # Default
+        for category, r in reversed(list(DEPRECIATION_RATES.items())):
+            rates[names.str.contains(category.lower(), regex=False).to_numpy()] = r
+        
+        # Coerce each amount column once instead of calling _safe_float per cell
+        def amounts(col):
+            return DataManager._safe_float_series(frame[col]).to_numpy() if col in frame.columns else 0.0
+        
+        # WDV Calculation: (Opening + Additions - Deletions) * Rate, accumulated in one buffer
+        dep = np.zeros(len(frame))
+        dep += amounts('Gross_Op')
+        dep += amounts('Additions')
+        dep -= amounts('Deletions')
+        dep *= rates
+        np.round(dep, 2, out=dep)
+        for record, d in zip(ppe_records, dep.tolist()):
+            record['Dep_Year'] = d
         return ppe_records
 
     @staticmethod
@@ -104,29 +204,58 @@ class DataManager:
             return float(value)
         except: return 0.0
 
+    @staticmethod
+    def _safe_float_series(series):
+        """Vectorized _safe_float: strip thousands separators and coerce, NaN/invalid -> 0.0"""
+        if not pd.api.types.is_numeric_dtype(series):
+            series = series.astype(str).str.replace(',', '', regex=False).str.strip()
+        return pd.to_numeric(series, errors='coerce').fillna(0.0).astype(float)
+
     @staticmethod
     def _validate_dataframe(df, name_col, cy_col, py_col):
-        if df.empty: return False, "File is empty"
-        if name_col not in df.columns: return False, f"Column '{name_col}' not found"
-        return True, "Valid"
+        """Validate the raw TB and coerce its amount columns once for reuse by the caller"""
+        if df.empty: return False, "File is empty", None, None
+        if name_col not in df.columns: return False, f"Column '{name_col}' not found", None, None
+        cy_numeric = DataManager._safe_float_series(df[cy_col])
+        py_numeric = DataManager._safe_float_series(df[py_col]) if py_col else None
+        return True, "Valid", cy_numeric, py_numeric
 
     @staticmethod
     def validate_tb_data(data):
         required_fields = ['Ledger Name', 'Amount_CY', 'Group_Head']
-        for i, row in enumerate(data):
-            for field in required_fields:
-                if field not in row or not str(row[field]).strip():
-                    return False, f"Row {i+1}: Missing '{field}'"
+        if not len(data):
+            return True, "Success"
+        # One blank-mask per field (rows x fields), then locate the first failing cell
+        blank = np.column_stack([
+            np.char.str_len(np.char.strip(np.array([str(r[field]) if field in r else '' for r in data]))) == 0
+            for field in required_fields
+        ])
+        bad_rows = blank.any(axis=1)
+        if bad_rows.any():
+            i = int(bad_rows.argmax())
+            field = required_fields[int(blank[i].argmax())]
+            return False, f"Row {i+1}: Missing '{field}'"
         return True, "Success"
 
+    @staticmethod
+    def _as_f64(data, field):
+        """Amount field of every record as a float64 array"""
+        # One vectorized coercion instead of a try/except float() per record
+        values = pd.Series([r.get(field, 0) for r in data], dtype=object)
+        return DataManager._safe_float_series(values).to_numpy(dtype=np.float64)
+
     @staticmethod
     def analyze_data_quality(data):
+        # Pull each column out once as a contiguous array; every metric is then one NumPy reduction
+        cy = DataManager._as_f64(data, 'Amount_CY')
+        py = DataManager._as_f64(data, 'Amount_PY')
+        has_group = np.fromiter((bool(r.get('Group_Head')) for r in data), dtype=bool, count=len(data))
         metrics = {
             'total_records': len(data),
-            'records_with_cy': sum(1 for r in data if r.get('Amount_CY', 0) != 0),
-            'records_with_py': sum(1 for r in data if r.get('Amount_PY', 0) != 0),
-            'records_with_group': sum(1 for r in data if r.get('Group_Head')),
-            'total_cy_amount': sum(r.get('Amount_CY', 0) for r in data),
-            'total_py_amount': sum(r.get('Amount_PY', 0) for r in data),
+            'records_with_cy': int(np.count_nonzero(cy)),
+            'records_with_py': int(np.count_nonzero(py)),
+            'records_with_group': int(np.count_nonzero(has_group)),
+            'total_cy_amount': float(cy.sum()),
+            'total_py_amount': float(py.sum()),
         }
         return metrics
\ No newline at end of file
@@ -1,11 +1,32 @@
 # npo_excel.py
 import xlsxwriter
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from npo_config import *
 from npo_compliance import ComplianceCalculator
+from npo_data import DataManager
+
+# PPE schedule columns holding amounts (coerced to numbers once per generate)
+PPE_AMOUNT_COLS = ['Gross_Op', 'Additions', 'Deletions', 'Dep_Op', 'Dep_Year']
 
 class ExcelGenerator:
+    # Preset sheet name -> writer method, shared by every instance
+    SHEET_GENERATORS = {
+        'Balance Sheet': '_write_bs',
+        'Income & Expenditure': '_write_pl',
+        'Notes to Accounts': '_write_notes',
+        'Policies': '_write_policies',
+        'PPE Schedule': '_write_ppe',
+        'Asset Register (IAR)': '_write_iar',
+        'Sch VIII (Guj BS)': '_write_gujarat_sch8',
+        'Sch IX (Guj IE)': '_write_gujarat_sch9',
+        'ICAI NPO Schedules': '_write_ica_schedules',
+        'Fund Flow': '_write_fund_flow',
+        'Receipts & Payments': '_write_receipts_payments',
+        'Compliance Report': '_write_compliance_report'
+    }
+
     def __init__(self, org_data, tb_data, ppe_data, fund_data, policies_text, theme, include_gujarat=True, include_ica=True):
         self.org = org_data
         self.tb = pd.DataFrame(tb_data)
@@ -17,18 +38,22 @@ class ExcelGenerator:
         self.include_ica = include_ica
         self.note_map = {}
         self.compliance_report = None
+        self._cy_by_group = {}
+        self._py_by_group = {}
+        self._income_mask = None
+        self._expense_mask = None
+        self._ppe_net_block = 0.0
 
     def generate(self, filename, preset=None):
         """Generate Excel report with optional preset"""
-        # Convert amounts to numeric
-        for col in ['Amount_CY', 'Amount_PY']:
-            self.tb[col] = pd.to_numeric(self.tb[col], errors='coerce').fillna(0)
+        self._prepare_data()
         
         # Generate compliance report
         self.compliance_report = self._generate_compliance_report()
         
         self._assign_notes()
-        wb = xlsxwriter.Workbook(filename)
+        # Every writer fills its sheet top-to-bottom, so rows can be flushed to disk as they complete
+        wb = xlsxwriter.Workbook(filename, {'constant_memory': True})
         self._init_formats(wb)
         
         # Generate sheets based on preset or default
@@ -39,6 +64,38 @@ class ExcelGenerator:
         
         wb.close()
 
+    def _prepare_data(self):
+        """Coerce amounts to numbers and total them per Group_Head once for all writers"""
+        for col in ['Amount_CY', 'Amount_PY']:
+            self.tb[col] = pd.to_numeric(self.tb[col], errors='coerce').fillna(0)
+        if not self.ppe.empty:
+            # Same parsing as the UI's 10B tab ("1,000" -> 1000.0); a missing column counts as zeros
+            amounts = self.ppe.reindex(columns=PPE_AMOUNT_COLS, fill_value=0)
+            for col in PPE_AMOUNT_COLS:
+                self.ppe[col] = DataManager._safe_float_series(amounts[col])
+            p = self.ppe
+            self._ppe_net_block = float(((p['Gross_Op'] + p['Additions'] - p['Deletions'])
+                                         - (p['Dep_Op'] + p['Dep_Year'])).sum())
+        
+        # Group_Head as int codes: per-group totals and group-set masks then work on contiguous ints
+        codes, uniques = pd.factorize(self.tb['Group_Head'])
+        known = codes >= 0
+        n_groups = len(uniques)
+        cy = np.bincount(codes[known], weights=self.tb['Amount_CY'].to_numpy(dtype=float)[known], minlength=n_groups)
+        py = np.bincount(codes[known], weights=self.tb['Amount_PY'].to_numpy(dtype=float)[known], minlength=n_groups)
+        self._cy_by_group = dict(zip(uniques, cy.tolist()))
+        self._py_by_group = dict(zip(uniques, py.tolist()))
+        
+        def group_mask(groups):
+            wanted = [i for i, g in enumerate(uniques) if g in groups]
+            return np.isin(codes, np.array(wanted, dtype=codes.dtype))
+        self._income_mask = group_mask(PL_INCOME_SET)
+        self._expense_mask = group_mask(PL_EXPENSE_SET)
+
+    def _cy_sum(self, groups):
+        """Total Amount_CY over the given Group_Heads"""
+        return sum(self._cy_by_group.get(g, 0.0) for g in groups)
+
     def _generate_by_preset(self, wb, preset_name):
         """Generate sheets based on preset"""
         from npo_templates import ReportPreset
@@ -48,28 +105,15 @@ class ExcelGenerator:
             self._generate_all_sheets(wb)
             return
         
-        # Generate sheets in preset order
-        sheet_generators = {
-            'Balance Sheet': self._write_bs,
-            'Income & Expenditure': self._write_pl,
-            'Notes to Accounts': self._write_notes,
-            'Policies': self._write_policies,
-            'PPE Schedule': self._write_ppe,
-            'Asset Register (IAR)': self._write_iar,
-            'Sch VIII (Guj BS)': self._write_gujarat_sch8,
-            'Sch IX (Guj IE)': self._write_gujarat_sch9,
-            'ICAI NPO Schedules': self._write_ica_schedules,
-            'Fund Flow': self._write_fund_flow,
-            'Receipts & Payments': self._write_receipts_payments,
-            'Compliance Report': self._write_compliance_report
-        }
-        
+        # Generate sheets in preset order; a failing sheet is reported and skipped
         for sheet_name in preset['sheets']:
-            if sheet_name in sheet_generators:
-                try:
-                    sheet_generators[sheet_name](wb)
-                except Exception as e:
-                    print(f"Error generating {sheet_name}: {e}")
+            method_name = self.SHEET_GENERATORS.get(sheet_name)
+            if method_name is None:
+                continue
+            try:
+                getattr(self, method_name)(wb)
+            except Exception as e:
+                print(f"Error generating {sheet_name}: {e}")
 
     def _generate_all_sheets(self, wb):
         """Generate all sheets"""
@@ -132,20 +176,29 @@ class ExcelGenerator:
         
         row = 3
         if not self.ppe.empty:
-            for idx, r in self.ppe.iterrows():
-                r = pd.to_numeric(r, errors='ignore')
-                gross = r['Gross_Op'] + r['Additions'] - r['Deletions']
-                net = gross - (r['Dep_Op'] + r['Dep_Year'])
-                ws.write(row, 0, idx+1)
-                ws.write(row, 1, r['Asset Name'])
-                ws.write(row, 2, r['Gross_Op'], self.fmt['curr'])
-                ws.write(row, 3, r['Additions'], self.fmt['curr'])
-                ws.write(row, 4, r['Deletions'], self.fmt['curr'])
-                ws.write(row, 5, gross, self.fmt['curr'])
-                ws.write(row, 6, r['Dep_Year'], self.fmt['curr'])
-                ws.write(row, 7, net, self.fmt['curr'])
+            # Cost and net block for every asset in two array expressions
+            gross_op, additions, deletions, dep_op, dep_year = (
+                self.ppe[c].to_numpy(dtype=float) for c in PPE_AMOUNT_COLS)
+            gross = gross_op + additions - deletions
+            net = gross - (dep_op + dep_year)
+            # Whole rows per call; write_column would go back up the sheet, which constant_memory drops
+            amounts = np.column_stack([gross_op, additions, deletions, gross, dep_year, net]).tolist()
+            curr = self.fmt['curr']; write = ws.write; write_num = ws.write_number
+            for idx, (name, vals) in enumerate(zip(self.ppe['Asset Name'].tolist(), amounts)):
+                write_num(row, 0, idx+1)
+                write(row, 1, name)
+                for col, v in enumerate(vals, 2):
+                    write_num(row, col, v, curr)
                 row += 1
 
+    def _guj_line_totals(self, rev_map):
+        """Total Amount_CY per Gujarat display line from a single groupby over the TB"""
+        totals = {}
+        for group, amount in self._cy_by_group.items():
+            for line in rev_map.get(group, ()):
+                totals[line] = totals.get(line, 0) + amount
+        return totals
+
     def _write_gujarat_sch8(self, wb):
         ws = wb.add_worksheet('Sch VIII (Guj BS)')
         ws.set_column('A:A', 50); ws.set_column('B:B', 20)
@@ -153,39 +206,38 @@ class ExcelGenerator:
         ws.merge_range('A2:B2', f"Balance Sheet of {self.org.get('Name','')} as at {self.org.get('Date','')}", self.fmt['bold'])
         ws.write(3, 0, "FUNDS & LIABILITIES", self.fmt['head']); ws.write(3, 1, "Rs.", self.fmt['head'])
         
+        liab_totals = self._guj_line_totals(GUJ_BS_LIAB_REV)
+        asset_totals = self._guj_line_totals(GUJ_BS_ASSETS_REV)
+        
+        bold = self.fmt['bold']; curr = self.fmt['curr']
         row = 4
-        for guj_h, groups in GUJ_BS_LIAB_MAP.items():
-            ws.write(row, 0, guj_h, self.fmt['bold'])
-            val = self.tb[self.tb['Group_Head'].isin(groups)]['Amount_CY'].sum()
-            ws.write(row, 1, val, self.fmt['curr']); row += 1
+        for guj_h in GUJ_BS_LIAB_MAP:
+            ws.write(row, 0, guj_h, bold); ws.write_number(row, 1, liab_totals.get(guj_h, 0), curr); row += 1
             
         row += 2
         ws.write(row, 0, "PROPERTY AND ASSETS", self.fmt['head']); ws.write(row, 1, "Rs.", self.fmt['head']); row += 1
         for guj_h, groups in GUJ_BS_ASSETS_MAP.items():
-            ws.write(row, 0, guj_h, self.fmt['bold'])
-            val = self.tb[self.tb['Group_Head'].isin(groups)]['Amount_CY'].sum()
+            val = asset_totals.get(guj_h, 0)
             if 'Property, Plant & Equipment' in groups and not self.ppe.empty:
-                for _,r in self.ppe.iterrows(): 
-                    r = pd.to_numeric(r, errors='ignore')
-                    val += (r['Gross_Op']+r['Additions']-r['Deletions']) - (r['Dep_Op']+r['Dep_Year'])
-            ws.write(row, 1, val, self.fmt['curr']); row += 1
+                val += self._ppe_net_block
+            ws.write(row, 0, guj_h, bold); ws.write_number(row, 1, val, curr); row += 1
 
     def _write_gujarat_sch9(self, wb):
         ws = wb.add_worksheet('Sch IX (Guj IE)')
         ws.set_column('A:A', 50); ws.set_column('B:B', 20)
         ws.merge_range('A1:B1', "SCHEDULE IX [Vide Rule 17(1)]", self.fmt['title'])
+        exp_totals = self._guj_line_totals(GUJ_IE_EXP_REV)
+        inc_totals = self._guj_line_totals(GUJ_IE_INC_REV)
+        
+        curr = self.fmt['curr']
         ws.write(3, 0, "EXPENDITURE", self.fmt['head']); ws.write(3, 1, "Rs.", self.fmt['head']); row = 4
-        for guj_h, groups in GUJ_IE_EXP_MAP.items():
-            ws.write(row, 0, guj_h)
-            val = self.tb[self.tb['Group_Head'].isin(groups)]['Amount_CY'].sum()
-            ws.write(row, 1, val, self.fmt['curr']); row += 1
+        for guj_h in GUJ_IE_EXP_MAP:
+            ws.write(row, 0, guj_h); ws.write_number(row, 1, exp_totals.get(guj_h, 0), curr); row += 1
             
         row += 2
         ws.write(row, 0, "INCOME", self.fmt['head']); ws.write(row, 1, "Rs.", self.fmt['head']); row += 1
-        for guj_h, groups in GUJ_IE_INC_MAP.items():
-            ws.write(row, 0, guj_h)
-            val = self.tb[self.tb['Group_Head'].isin(groups)]['Amount_CY'].sum()
-            ws.write(row, 1, val, self.fmt['curr']); row += 1
+        for guj_h in GUJ_IE_INC_MAP:
+            ws.write(row, 0, guj_h); ws.write_number(row, 1, inc_totals.get(guj_h, 0), curr); row += 1
 
     def _write_gujarat_schedule10(self, wb):
         ws = wb.add_worksheet('Sch X (Property)')
@@ -213,14 +265,18 @@ class ExcelGenerator:
         for i, h in enumerate(headers): ws.write(2, i, h, self.fmt['head'])
         
         row = 3
+        curr = self.fmt['curr']; write = ws.write; write_num = ws.write_number
+        # Split the fund table by Type in one pass, then emit the types in FUND_TYPES order
+        by_type = dict(list(self.fund.groupby('Type', sort=False))) if not self.fund.empty else {}
         for fund_type in FUND_TYPES:
-            fund_data = self.fund[self.fund['Type'] == fund_type]
-            if not fund_data.empty:
-                for _, f in fund_data.iterrows():
-                    closing = float(f['Opening']) + float(f['Received']) - float(f['Utilized'])
-                    vals = [f['Fund Name'], f['Opening'], f['Received'], f['Utilized'], closing]
-                    for i, v in enumerate(vals): 
-                        ws.write(row, i, v, self.fmt['curr'] if i > 0 else None)
+            fund_data = by_type.get(fund_type)
+            if fund_data is not None and not fund_data.empty:
+                cols = ['Fund Name', 'Opening', 'Received', 'Utilized']
+                for name, opening, received, utilized in fund_data[cols].itertuples(index=False, name=None):
+                    closing = float(opening) + float(received) - float(utilized)
+                    write(row, 0, name)
+                    for col, v in enumerate((opening, received, utilized, closing), 1):
+                        write_num(row, col, float(v), curr)
                     row += 1
         
         # Schedule II - Application of Funds
@@ -235,19 +291,19 @@ class ExcelGenerator:
         ws.merge_range('A1:C1', "FUND FLOW STATEMENT", self.fmt['title'])
         
         # Calculate sources and applications
-        income_total = self.tb[self.tb['Group_Head'].isin(PL_INCOME)]['Amount_CY'].sum()
-        expense_total = self.tb[self.tb['Group_Head'].isin(PL_EXPENSE)]['Amount_CY'].sum()
+        income_total = self._cy_sum(PL_INCOME)
+        expense_total = self._cy_sum(PL_EXPENSE)
         surplus = income_total - expense_total
         
         sources = [
             ('Operating Surplus', surplus),
-            ('Donations Received', self.tb[self.tb['Group_Head'] == 'Donations and Grants']['Amount_CY'].sum()),
+            ('Donations Received', self._cy_sum(['Donations and Grants'])),
             ('Other Sources', 0)
         ]
         
         applications = [
             ('Fixed Assets', self.ppe['Additions'].sum() if not self.ppe.empty else 0),
-            ('Investments', self.tb[self.tb['Group_Head'].isin(['Investments - Long Term', 'Investments - Current'])]['Amount_CY'].sum()),
+            ('Investments', self._cy_sum(['Investments - Long Term', 'Investments - Current'])),
             ('Loan Repayments', 0)
         ]
         
@@ -255,13 +311,13 @@ class ExcelGenerator:
         row = 3
         for desc, amount in sources:
             if amount != 0:
-                ws.write(row, 0, desc); ws.write(row, 1, amount, self.fmt['curr']); row += 1
+                ws.write_string(row, 0, desc); ws.write_number(row, 1, amount, self.fmt['curr']); row += 1
         
         row += 1
         ws.write(row, 0, "APPLICATION OF FUNDS", self.fmt['head']); ws.write(row, 1, "Amount", self.fmt['head']); row += 1
         for desc, amount in applications:
             if amount != 0:
-                ws.write(row, 0, desc); ws.write(row, 1, amount, self.fmt['curr']); row += 1
+                ws.write_string(row, 0, desc); ws.write_number(row, 1, amount, self.fmt['curr']); row += 1
 
     def _write_receipts_payments(self, wb):
         ws = wb.add_worksheet('Receipts & Payments')
@@ -289,23 +345,23 @@ class ExcelGenerator:
             sec11 = self.compliance_report.get('section_11', {})
             status = "✅ COMPLIANT" if sec11.get('compliance_85_percent') else "❌ NON-COMPLIANT"
             remarks = f"Application: {sec11.get('total_application',0):,.2f} / Required: {sec11.get('required_application',0):,.2f}"
-            ws.write(row, 0, "Income Tax Section 11")
-            ws.write(row, 1, status, self.fmt['success'] if 'COMPLIANT' in status else self.fmt['error'])
-            ws.write(row, 2, remarks); row += 1
+            ws.write_string(row, 0, "Income Tax Section 11")
+            ws.write_string(row, 1, status, self.fmt['success'] if 'COMPLIANT' in status else self.fmt['error'])
+            ws.write_string(row, 2, remarks); row += 1
             
             # Gujarat Compliance
             guj_issues = self.compliance_report.get('gujarat_compliance', {}).get('issues', [])
             status = "✅ COMPLIANT" if not guj_issues else f"⚠️ {len(guj_issues)} ISSUES"
-            ws.write(row, 0, "Gujarat Trust Act")
-            ws.write(row, 1, status, self.fmt['success'] if 'COMPLIANT' in status else self.fmt['warning'])
-            ws.write(row, 2, "; ".join(guj_issues[:2]) if guj_issues else "All requirements met"); row += 1
+            ws.write_string(row, 0, "Gujarat Trust Act")
+            ws.write_string(row, 1, status, self.fmt['success'] if 'COMPLIANT' in status else self.fmt['warning'])
+            ws.write_string(row, 2, "; ".join(guj_issues[:2]) if guj_issues else "All requirements met"); row += 1
             
             # ICAI Compliance
             ica_status = self.compliance_report.get('ica_compliance', {})
             status = "✅ SCHEDULES READY" if ica_status.get('notes_required') else "⚠️ INCOMPLETE"
-            ws.write(row, 0, "ICAI NPO Guidance")
-            ws.write(row, 1, status, self.fmt['success'] if 'READY' in status else self.fmt['warning'])
-            ws.write(row, 2, f"Schedules: {', '.join(ica_status.get('schedules_required', []))}"); row += 2
+            ws.write_string(row, 0, "ICAI NPO Guidance")
+            ws.write_string(row, 1, status, self.fmt['success'] if 'READY' in status else self.fmt['warning'])
+            ws.write_string(row, 2, f"Schedules: {', '.join(ica_status.get('schedules_required', []))}"); row += 2
             
             # Recommendations
             ws.write(row, 0, "RECOMMENDATIONS", self.fmt['bold']); row += 1
@@ -315,9 +371,9 @@ class ExcelGenerator:
             if guj_issues:
                 recommendations.extend(guj_issues[:3])
             
-            for rec in recommendations:
-                ws.write(row, 0, f"• {rec}", self.fmt['wrap'])
-                row += 1
+            # Last cells on the sheet and all in column A, so one write_column stays top-to-bottom
+            ws.write_column(row, 0, [f"• {rec}" for rec in recommendations], self.fmt['wrap'])
+            row += len(recommendations)
 
     def _write_unit_analysis(self, wb):
         if 'Unit' not in self.tb.columns:
@@ -331,14 +387,19 @@ class ExcelGenerator:
         for i, h in enumerate(headers): ws.write(2, i, h, self.fmt['head'])
         
         units = self.tb['Unit'].unique()
-        total_income = self.tb[self.tb['Group_Head'].isin(PL_INCOME)]['Amount_CY'].sum()
-        total_expense = self.tb[self.tb['Group_Head'].isin(PL_EXPENSE)]['Amount_CY'].sum()
+        total_income = self._cy_sum(PL_INCOME)
+        total_expense = self._cy_sum(PL_EXPENSE)
+        
+        # Tag rows as income/expense, then total every unit in one groupby
+        kind = np.where(self._income_mask, 'I', np.where(self._expense_mask, 'E', ''))
+        by_unit = (self.tb.groupby(['Unit', kind], sort=False)['Amount_CY'].sum()
+                   .unstack(fill_value=0).reindex(units, fill_value=0))
+        unit_income_totals = by_unit['I'] if 'I' in by_unit.columns else pd.Series(0, index=by_unit.index)
+        unit_expense_totals = by_unit['E'] if 'E' in by_unit.columns else pd.Series(0, index=by_unit.index)
         
         row = 3
-        for unit in units:
-            unit_data = self.tb[self.tb['Unit'] == unit]
-            unit_income = unit_data[unit_data['Group_Head'].isin(PL_INCOME)]['Amount_CY'].sum()
-            unit_expense = unit_data[unit_data['Group_Head'].isin(PL_EXPENSE)]['Amount_CY'].sum()
+        curr = self.fmt['curr']; write = ws.write; write_num = ws.write_number
+        for unit, unit_income, unit_expense in zip(units, unit_income_totals.tolist(), unit_expense_totals.tolist()):
             unit_surplus = unit_income - unit_expense
             
             if total_income != 0:
@@ -346,25 +407,25 @@ class ExcelGenerator:
             else:
                 income_pct = 0
             
-            ws.write(row, 0, unit)
-            ws.write(row, 1, unit_income, self.fmt['curr'])
-            ws.write(row, 2, unit_expense, self.fmt['curr'])
-            ws.write(row, 3, unit_surplus, self.fmt['curr'])
-            ws.write(row, 4, f"{income_pct:.1f}%")
+            write(row, 0, unit)
+            write_num(row, 1, unit_income, curr)
+            write_num(row, 2, unit_expense, curr)
+            write_num(row, 3, unit_surplus, curr)
+            ws.write_string(row, 4, f"{income_pct:.1f}%")
             row += 1
 
     def _generate_compliance_report(self):
         """Generate compliance report data"""
-        income_total = self.tb[self.tb['Group_Head'].isin(PL_INCOME)]['Amount_CY'].sum()
-        expense_total = self.tb[self.tb['Group_Head'].isin(PL_EXPENSE)]['Amount_CY'].sum()
-        
-        ppe_total = self.ppe['Additions'].sum() if not self.ppe.empty else 0
+        income_total = self._cy_sum(PL_INCOME)
+        expense_total = self._cy_sum(PL_EXPENSE)
         
+        # The calculator reads both frames directly; no per-row dicts are built. It also memoizes
+        # reports on a digest of these inputs, so another preset over the same data reuses this one
         return ComplianceCalculator.generate_compliance_report(
-            self.tb.to_dict('records'),
+            self.tb,
             income_total,
             expense_total,
-            self.ppe.to_dict('records') if not self.ppe.empty else None
+            self.ppe if not self.ppe.empty else None
         )
 
     # Previous methods (_write_bs, _write_pl, _write_policies, _write_notes, 
@@ -386,8 +447,8 @@ class ExcelGenerator:
         # ... existing code ...
         # Add program effectiveness
         row += 10
-        prog_exp = self.tb[self.tb['Group_Head'] == 'Programme Expenses']['Amount_CY'].sum()
-        total_exp = self.tb[self.tb['Group_Head'].isin(PL_EXPENSE)]['Amount_CY'].sum()
+        prog_exp = self._cy_sum(['Programme Expenses'])
+        total_exp = self._cy_sum(PL_EXPENSE)
         
         if total_exp > 0:
             prog_ratio = (prog_exp / total_exp) * 100
@@ -1,9 +1,32 @@
 # npo_templates.py
+import copy
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 import shutil
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@lru_cache(maxsize=128)
+def _read_template(path, mtime_ns):
+    """Parse a template file; keyed on mtime so an edited file is re-read"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+@lru_cache(maxsize=128)
+def _config_text(path, mtime_ns):
+    """Indented JSON of a template's config, for display; cached alongside the parse"""
+    return json.dumps(_read_template(path, mtime_ns).get('config', {}), indent=2)
+
+def _load_template_file(path):
+    """Parsed template for path, served from the cache while the file is unchanged (shared; do not mutate)"""
+    return _read_template(path, os.stat(path).st_mtime_ns)
+
 class TemplateManager:
     """Manage report templates"""
     
@@ -13,8 +36,7 @@ class TemplateManager:
     
     def ensure_template_dir(self):
         """Ensure template directory exists"""
-        if not os.path.exists(self.template_dir):
-            os.makedirs(self.template_dir)
+        os.makedirs(self.template_dir, exist_ok=True)
     
     def save_template(self, template_name, config_data, org_data, is_default=False):
         """Save current configuration as template"""
@@ -30,26 +52,36 @@ class TemplateManager:
         filepath = os.path.join(self.template_dir, filename)
         
         try:
-            with open(filepath, 'w') as f:
-                json.dump(template, f, indent=2)
+            # Encode in one go and hand the file a single write
+            if orjson is not None:
+                encoded = orjson.dumps(template, option=orjson.OPT_INDENT_2)
+            else:
+                encoded = json.dumps(template, indent=2).encode()
+            with open(filepath, 'wb') as f:
+                f.write(encoded)
             return True, filepath
         except Exception as e:
             return False, str(e)
     
-    def load_template(self, template_name):
-        """Load template by name"""
+    def load_template(self, template_name, shared=False):
+        """Load template by name; shared=True returns the cached dict itself (read-only)"""
         filename = f"{template_name.replace(' ', '_')}.json"
         filepath = os.path.join(self.template_dir, filename)
         
         try:
-            with open(filepath, 'r') as f:
-                template = json.load(f)
-            return True, template
+            # Callers may edit the template they get back, so hand out a copy of the cached one
+            template = _load_template_file(filepath)
+            return True, template if shared else copy.deepcopy(template)
         except FileNotFoundError:
             return False, f"Template '{template_name}' not found"
         except Exception as e:
             return False, str(e)
     
+    def config_text(self, template_name):
+        """Template config formatted for display, re-rendered only when the file changes"""
+        filepath = os.path.join(self.template_dir, f"{template_name.replace(' ', '_')}.json")
+        return _config_text(filepath, os.stat(filepath).st_mtime_ns)
+    
     def list_templates(self):
         """List all available templates"""
         templates = []
@@ -57,8 +89,7 @@ class TemplateManager:
         for filename in os.listdir(self.template_dir):
             if filename.endswith('.json'):
                 try:
-                    with open(os.path.join(self.template_dir, filename), 'r') as f:
-                        template = json.load(f)
+                    template = _load_template_file(os.path.join(self.template_dir, filename))
                     templates.append({
                         'name': template.get('name', filename),
                         'created_at': template.get('created_at'),
@@ -192,6 +223,7 @@ class ReportPreset:
         return cls.PRESETS.get(preset_name)
     
     @classmethod
+    @lru_cache(maxsize=None)
     def list_presets(cls):
-        """List all available presets"""
-        return list(cls.PRESETS.keys())
\ No newline at end of file
+        """List all available presets (cached; PRESETS is fixed for the session)"""
+        return tuple(cls.PRESETS.keys())
\ No newline at end of file
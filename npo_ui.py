@@ -1,8 +1,17 @@
 # npo_ui.py
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import threading
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
+from itertools import compress
+import hashlib
+import numpy as np
+import pandas as pd
 from npo_config import *
 from npo_data import DataManager
 from npo_excel import ExcelGenerator
@@ -11,10 +20,54 @@ from npo_security import InputValidator
 from npo_audit import AuditLogger, UserActivityTracker
 from npo_templates import TemplateManager, ReportPreset
 
+# Mapping-grid column keys and the TB record fields they hold
+MAP_FIELDS = (('unit', 'Unit'), ('name', 'Ledger Name'), ('cy', 'Amount_CY'), ('py', 'Amount_PY'),
+              ('grp', 'Group_Head'), ('sub', 'Sub_Group'), ('fund', 'Fund_Type'))
+AMOUNT_KEYS = ('cy', 'py')  # held as floats in map_cols, parsed once when entered
+MAP_LOAD_BATCH = 2000  # rows inserted per event-loop turn when importing a TB
+
+# Fixed pieces of the compliance report text
+REPORT_HEADER = "=" * 60 + "\nCOMPLIANCE STATUS REPORT\n" + "=" * 60 + "\n\n"
+SECTION_RULE = "-" * 40 + "\n"
+
+# Values for a freshly added schedule row
+DEFAULT_PPE_ROW = ("New Asset", 0, 0, 0, 0, 0, 0)
+DEFAULT_FUND_ROW = ("New Fund", "Restricted", 0, 0, 0)
+
+# Category of each group head: 0 asset, 1 liability, 2 income, 3 other expense, 4 other,
+# 5 depreciation (kept apart for the 10B revenue application), 6 programme expenses
+# (kept apart for the programme expense ratio); expenses in total are 3 + 5 + 6
+GROUP_CODE = {name: code for code, names in enumerate((BS_ASSETS, BS_LIABILITIES, PL_INCOME, PL_EXPENSE))
+              for name in names}
+GROUP_CODE['Depreciation'] = 5
+GROUP_CODE['Programme Expenses'] = 6
+N_GROUP_CODES = 7
+
+def _tally(amounts, codes):
+    """Per-category totals of amounts in one pass over their GROUP_CODE codes"""
+    return np.bincount(codes, weights=amounts, minlength=N_GROUP_CODES)
+
+@lru_cache(maxsize=32)
+def _parse_units(units_str):
+    """Units named in the comma-separated Units field, after 'Consolidated', without duplicates"""
+    return tuple(dict.fromkeys(['Consolidated', *(u.strip() for u in units_str.split(',') if u.strip())]))
+
+def _open_folder(folder):
+    """Show a folder in the platform file manager without waiting for it to start"""
+    if sys.platform == 'win32':
+        subprocess.Popen(['explorer', folder], close_fds=True)
+    else:
+        subprocess.Popen(['open' if sys.platform == 'darwin' else 'xdg-open', folder], close_fds=True)
+
+def _run_generate(args, path, preset):
+    """Build the workbook in a worker process (module level so it can be pickled)"""
+    ExcelGenerator(*args).generate(path, preset)
+
 class NPOApp:
     def __init__(self, root):
         self.root = root
         self.root.title(f"{APP_NAME} v{VERSION}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.geometry("1800x1000")
         
         # Initialize managers
@@ -37,18 +90,36 @@ class NPOApp:
         self.is_validated = False
         self.current_data_hash = None
         self.progress = None
+        self.pool = None  # worker processes for report generation, started on first use
+        self._closing = False  # set once the window is closing; late worker results are dropped
+        self._status_pending = None
+        self._load_job = None  # pending after() id of a batched TB import
+        
+        # Combobox option lists shared by every mapping-cell editor
+        self._all_groups_tuple = tuple(ALL_GROUPS)
+        self._fund_types_tuple = tuple(FUND_TYPES)
+        self._sub_cache = {g: tuple(v) for g, v in SUB_GROUP_MAPPING.items()}
+        # Presets and themes do not change during a session
+        self._preset_values = ReportPreset.list_presets()
+        self._theme_values = tuple(COLOR_THEMES.keys())
         
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
         
+        # Tabs that generation reads from are built now; the rest get an empty frame
+        # (keeping the tab order) and are built the first time they are selected
         self.setup_org_tab()
         self.setup_mapping_tab()
         self.setup_schedules_tab()
-        self.setup_unit_analysis_tab()
-        self.setup_compliance_tab()
-        self.setup_10b_tab()
-        self.setup_templates_tab()
+        self._pending_tabs = {}
+        for title, builder in ((" 📈 Unit Analysis ", self.setup_unit_analysis_tab),
+                               (" ✅ Compliance ", self.setup_compliance_tab),
+                               (" 📋 10B/BB Calculator ", self.setup_10b_tab),
+                               (" 📁 Templates ", self.setup_templates_tab)):
+            f = ttk.Frame(self.notebook); self.notebook.add(f, text=title)
+            self._pending_tabs[str(f)] = (builder, f)
         self.setup_policies_tab()
+        self.notebook.bind("<<NotebookTabChanged>>", self._build_tab_if_needed)
         
         # Footer
         f_bar = tk.Frame(root, bg="#2C3E50", height=80)
@@ -68,7 +139,7 @@ class NPOApp:
                 font=("Segoe UI", 10)).pack(side='left', padx=(20, 5))
         self.theme_var = tk.StringVar(value="RB Blue")
         ttk.Combobox(f_bar, textvariable=self.theme_var, 
-                    values=list(COLOR_THEMES.keys()), 
+                    values=self._theme_values, 
                     state="readonly", width=20).pack(side='left')
         
         # Preset selector
@@ -76,7 +147,7 @@ class NPOApp:
                 font=("Segoe UI", 10)).pack(side='left', padx=(20, 5))
         self.preset_var = tk.StringVar(value="full_compliance")
         self.preset_combo = ttk.Combobox(f_bar, textvariable=self.preset_var,
-                                        values=ReportPreset.list_presets(),
+                                        values=self._preset_values,
                                         state="readonly", width=20)
         self.preset_combo.pack(side='left')
         
@@ -85,6 +156,13 @@ class NPOApp:
                   state="disabled", command=self.start_generation, padx=20)
         self.btn_gen.pack(side='right', padx=20, pady=10)
 
+    def _build_tab_if_needed(self, event=None):
+        """Build a lazily created tab the first time it is shown"""
+        pending = self._pending_tabs.pop(self.notebook.select(), None)
+        if pending:
+            builder, f = pending
+            builder(f)
+
     def _setup_styles(self):
         style = ttk.Style()
         style.theme_use('clam')
@@ -94,103 +172,119 @@ class NPOApp:
                  foreground=[("selected", "white")])
 
     def update_status(self, message, is_error=False):
-        """Update status label"""
+        """Update status label on the next idle pass; a burst of updates shows only the last"""
+        # Tk thread only; worker threads go through self.root.after(0, self.update_status, ...)
+        pending = self._status_pending
+        self._status_pending = (message, is_error)
+        if pending is None:
+            self.root.after_idle(self._apply_status)
+
+    def _apply_status(self):
+        message, is_error = self._status_pending
+        self._status_pending = None
         color = "red" if is_error else "white"
         self.status_label.config(text=message, fg=color)
-        self.root.update_idletasks()
 
     def start_generation(self):
-        """Start generation in separate thread"""
+        """Start generation in a worker process"""
         if not self.is_validated:
             messagebox.showerror("Locked", "Please Validate first.")
             return
         
+        # The dialog and every widget read happen here on the Tk thread; the worker gets plain data
+        path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx", 
+            filetypes=[("Excel", "*.xlsx")],
+            initialfile=f"NPO_Report_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+        )
+        if not path:
+            return
+        
+        tgt = self.unit_var.get()
+        preset = self.preset_var.get()
+        args = self._generation_args(tgt)
+        
         # Start progress bar
         self.progress_bar.start()
         self.btn_gen.config(state="disabled", text="Generating...")
-        self.update_status("Generating report...")
+        self.update_status("Writing workbook...")
+        
+        # Writing the workbook is CPU-bound; a worker process keeps it from holding the GIL.
+        # The pool is created and fed from the Tk thread; the result comes back through root.after
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=2)
+        org_name = args[0].get('Name', 'Unknown')
+        future = self.pool.submit(_run_generate, args, path, preset)
+        future.add_done_callback(
+            lambda f: self._post_generation_done(f, path, preset, tgt, org_name))
+
+    def _generation_args(self, tgt):
+        """ExcelGenerator arguments collected from the widgets"""
+        org = {k: v.get() for k, v in self.org_vars.items()}
+        pol = self.txt_pol.get("1.0", tk.END)
+        theme = COLOR_THEMES[self.theme_var.get()]
         
-        # Run in separate thread
-        thread = threading.Thread(target=self.generate)
-        thread.daemon = True
-        thread.start()
+        # Collect data
+        tb = self.collect_mapping_data(tgt)
+        
+        # Copies of the schedule rows, so the worker never shares the UI's dicts
+        ppe = [dict(r) for r in self._ppe_rows.values()]
+        fund = [dict(r) for r in self._fund_rows.values()]
+        
+        # Get include options
+        include_gujarat = self.gujarat_var.get() if hasattr(self, 'gujarat_var') else True
+        include_ica = self.ica_var.get() if hasattr(self, 'ica_var') else True
+        
+        return (org, tb, ppe, fund, pol, theme, include_gujarat, include_ica)
 
-    def generate(self):
-        """Generate reports"""
+    def _post_generation_done(self, future, *args):
+        """Done-callback (pool thread): hand the result to the Tk thread unless the window has closed"""
+        if self._closing:
+            return
         try:
-            org = {k: v.get() for k, v in self.org_vars.items()}
-            pol = self.txt_pol.get("1.0", tk.END)
-            tgt = self.unit_var.get()
-            theme = COLOR_THEMES[self.theme_var.get()]
-            preset = self.preset_var.get()
-            
-            # Collect data
-            tb = self.collect_mapping_data(tgt)
-            
-            ppe = []
-            for i in self.ppe_tree.get_children():
-                values = self.ppe_tree.item(i, "values")
-                if len(values) >= 7:
-                    ppe.append({
-                        'Asset Name': values[0],
-                        'Gross_Op': values[1],
-                        'Additions': values[2],
-                        'Deletions': values[3],
-                        'Dep_Op': values[4],
-                        'Dep_Year': values[5],
-                        'Dep_Del': values[6]
-                    })
-            
-            fund = []
-            for i in self.fund_tree.get_children():
-                values = self.fund_tree.item(i, "values")
-                if len(values) >= 5:
-                    fund.append({
-                        'Fund Name': values[0],
-                        'Type': values[1],
-                        'Opening': values[2],
-                        'Received': values[3],
-                        'Utilized': values[4]
-                    })
-            
-            # Get include options
-            include_gujarat = self.gujarat_var.get() if hasattr(self, 'gujarat_var') else True
-            include_ica = self.ica_var.get() if hasattr(self, 'ica_var') else True
-            
-            path = filedialog.asksaveasfilename(
-                defaultextension=".xlsx", 
-                filetypes=[("Excel", "*.xlsx")],
-                initialfile=f"NPO_Report_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-            )
-            
-            if path:
-                eng = ExcelGenerator(org, tb, ppe, fund, pol, theme, 
-                                   include_gujarat, include_ica)
-                eng.generate(path, preset)
-                
-                # Log the generation
-                self.audit_logger.log_generation(
-                    org.get('Name', 'Unknown'),
-                    path,
-                    {'unit': tgt, 'preset': preset}
-                )
-                
-                # Show success
-                self.root.after(0, lambda: messagebox.showinfo(
-                    "Success", 
-                    f"Financial statements saved to:\n{path}\n\n" +
-                    f"Generated with preset: {preset}"
-                ))
-                
-                # Open file location
-                import os
-                os.startfile(os.path.dirname(path))
-            
+            self.root.after(0, self._on_generation_done, future, *args)
+        except (RuntimeError, tk.TclError):
+            pass  # the window was destroyed after the check
+
+    def _on_generation_done(self, future, path, preset, tgt, org_name):
+        """Report the worker's result (Tk thread, scheduled from the future's done-callback)"""
+        self.stop_progress()
+        try:
+            future.result()
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
+            if isinstance(e, BrokenProcessPool):
+                # A dead worker leaves the pool unusable; start a fresh one next time
+                self.pool = None
+            messagebox.showerror("Error", str(e))
             self.audit_logger.log_error("generation", str(e), {'preset': preset})
-        finally:
-            self.root.after(0, self.stop_progress)
+            return
+        
+        # Log the generation
+        self.audit_logger.log_generation(
+            org_name,
+            path,
+            {'unit': tgt, 'preset': preset}
+        )
+        self._on_generated(path, preset)
+
+    def _on_generated(self, path, preset):
+        """Show the success message, then open the folder holding the new report"""
+        messagebox.showinfo(
+            "Success", 
+            f"Financial statements saved to:\n{path}\n\n" +
+            f"Generated with preset: {preset}"
+        )
+        try:
+            _open_folder(os.path.dirname(path))
+        except OSError:
+            pass
+
+    def on_close(self):
+        """Close the window without waiting for a running report; queued jobs are dropped"""
+        self._closing = True
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
     def stop_progress(self):
         """Stop progress bar and update UI"""
@@ -199,22 +293,110 @@ class NPOApp:
         self.update_status("Ready")
 
     def collect_mapping_data(self, target_unit):
-        """Collect data from mapping tab"""
-        tb = []
-        for r in self.map_rows:
-            if r['frame'].winfo_exists():
-                u = r['w']['unit'].get()
-                if target_unit == "Consolidated" or u == target_unit:
-                    tb.append({
-                        'Ledger Name': r['w']['name'].get(),
-                        'Amount_CY': r['w']['cy'].get(),
-                        'Amount_PY': r['w']['py'].get(),
-                        'Group_Head': r['w']['grp'].get(),
-                        'Sub_Group': r['w']['sub'].get(),
-                        'Fund_Type': r['w']['fund'].get(),
-                        'Unit': u
-                    })
-        return tb
+        """Collect data from mapping tab (cached until the mapping changes; shared, do not mutate)"""
+        cached = self._mapping_cache.get(target_unit)
+        if cached is not None:
+            return cached
+        # Read the column buffers kept in sync with the grid; no Tk calls per row
+        cols = self.map_cols
+        keep = self._mapping_mask(target_unit)
+        records = self._mapping_cache[target_unit] = [{
+            'Ledger Name': cols['name'][i],
+            'Amount_CY': cols['cy'][i],
+            'Amount_PY': cols['py'][i],
+            'Group_Head': cols['grp'][i],
+            'Sub_Group': cols['sub'][i],
+            'Fund_Type': cols['fund'][i],
+            'Unit': cols['unit'][i]
+        } for i in np.flatnonzero(keep).tolist()]
+        return records
+
+    def _mapping_mask(self, target_unit):
+        """Boolean mask over the map_cols slots selecting the live rows of a unit"""
+        keep = np.fromiter(self.map_live, dtype=bool, count=len(self.map_live))
+        if target_unit != "Consolidated" and len(keep):
+            keep &= np.asarray(self.map_cols['unit']) == target_unit
+        return keep
+
+    def _mapping_column(self, key, keep):
+        """One map_cols field for the masked rows: float64 for amounts, object otherwise"""
+        return np.asarray(self.map_cols[key], dtype=np.float64 if key in AMOUNT_KEYS else object)[keep]
+
+    def _get_soa(self, target_unit):
+        """(Amount_CY float64, GROUP_CODE int8) arrays for a unit, built once per mapping version"""
+        soa = self._soa_cache.get(target_unit)
+        if soa is None:
+            keep = self._mapping_mask(target_unit)
+            codes = np.fromiter((GROUP_CODE.get(g, 4) for g in compress(self.map_cols['grp'], keep)),
+                                dtype=np.int8, count=int(keep.sum()))
+            soa = self._soa_cache[target_unit] = (self._mapping_column('cy', keep), codes)
+        return soa
+
+    def _group_tally(self, target_unit):
+        """Amount_CY totals of a unit's rows per GROUP_CODE category (memoized; do not modify)"""
+        sums = self._bucket_sums.get(target_unit)
+        if sums is None:
+            sums = self._bucket_sums[target_unit] = _tally(*self._get_soa(target_unit))
+        return sums
+
+    def _mapping_frame(self, target_unit):
+        """collect_mapping_data as a DataFrame, built column-wise from the buffers"""
+        keep = self._mapping_mask(target_unit)
+        return pd.DataFrame({field: self._mapping_column(key, keep) for key, field in MAP_FIELDS})
+
+    def _reset_map_cols(self):
+        """Empty the per-field column buffers behind the mapping rows"""
+        self.map_cols = {key: [] for key, _ in MAP_FIELDS}
+        self.map_live = []  # False once a row is removed (its slot stays, tombstoned)
+        self._by_unit = {}  # unit -> slots of its live rows, used to filter the grid
+        self._invalidate_map_cache()
+        # A batched import still running would keep appending into the fresh buffers
+        if self._load_job is not None:
+            self.root.after_cancel(self._load_job)
+            self._end_load()
+
+    def _invalidate_map_cache(self):
+        """Drop everything derived from the mapping rows; called on every row add/edit/removal"""
+        self.current_data_hash = None
+        self._mapping_cache = {}
+        self._soa_cache = {}
+        self._bucket_sums = {}
+        self._form10b_cache = {}
+
+    def _mapping_hash(self):
+        """Digest of the live mapping rows, cached in current_data_hash until the mapping changes"""
+        if self.current_data_hash is None:
+            live = self.map_live
+            mask = np.fromiter(live, dtype=bool, count=len(live))
+            h = hashlib.blake2b(digest_size=16)
+            for key, _ in MAP_FIELDS:
+                if key in AMOUNT_KEYS:
+                    h.update(np.asarray(self.map_cols[key], dtype=np.float64)[mask].tobytes())
+                else:
+                    h.update('\x1f'.join(compress(self.map_cols[key], live)).encode())
+                h.update(b'\x1e')
+            self.current_data_hash = h.hexdigest()
+        return self.current_data_hash
+
+    def _set_map_cell(self, slot, key, value):
+        """Write an edited cell back to map_cols and the grid row"""
+        shown = value
+        if key in AMOUNT_KEYS:
+            value = DataManager._safe_float(value)
+            shown = f"{value:,.2f}"
+        if key == 'unit':
+            self._by_unit[self.map_cols['unit'][slot]].remove(slot)
+            self._by_unit.setdefault(value, []).append(slot)
+        self.map_cols[key][slot] = value
+        self.map_tree.set(str(slot), key, shown)
+        self._invalidate_map_cache()
+        if key == 'unit' and self.unit_var.get() != "Consolidated":
+            self.filter_by_unit()
+
+    def _unit_totals(self, unit):
+        """(income, expenses, programme expenses) for a unit, read off its memoized category tally"""
+        tally = self._group_tally(unit)
+        return float(tally[2]), float(tally[3] + tally[5] + tally[6]), float(tally[6])
 
     def setup_org_tab(self):
         f = ttk.Frame(self.notebook); self.notebook.add(f, text=" 🏢 Organization ")
@@ -274,9 +456,11 @@ class NPOApp:
         t_bar = tk.Frame(f, bg="#BDC3C7", pady=8)
         t_bar.pack(fill='x')
         
-        tk.Button(t_bar, text="📂 Import CSV", command=self.load_csv, 
-                 bg="#2980B9", fg="white", font=("Segoe UI", 9, "bold")).pack(side='left', padx=10)
+        self.btn_import = tk.Button(t_bar, text="📂 Import CSV", command=self.load_csv, 
+                 bg="#2980B9", fg="white", font=("Segoe UI", 9, "bold"))
+        self.btn_import.pack(side='left', padx=10)
         tk.Button(t_bar, text="➕ Add Row", command=self.add_map_row, bg="white").pack(side='left', padx=5)
+        tk.Button(t_bar, text="➖ Remove Selected", command=self.remove_map_row, bg="white").pack(side='left', padx=5)
         tk.Button(t_bar, text="🗑️ Clear All", command=self.clear_mapping, bg="white").pack(side='left', padx=5)
         tk.Button(t_bar, text="↻ Refresh Units", command=self.update_units, bg="white").pack(side='left', padx=5)
         
@@ -286,135 +470,197 @@ class NPOApp:
                                     values=["Consolidated", "Main Unit"], 
                                     state="readonly", width=15)
         self.cmb_unit.pack(side='left')
-        self.cmb_unit.bind('<<ComboboxSelected>>', lambda e: self.filter_by_unit())
+        self.cmb_unit.bind('<<ComboboxSelected>>', lambda e: self._schedule_filter())
+        self._filter_job = None
         
         self.lbl_valid = tk.Label(t_bar, text="⚠️ Not Validated", bg="#E74C3C", 
                                 fg="white", font=("Segoe UI", 9, "bold"), padx=10)
         self.lbl_valid.pack(side='right', padx=10)
         
-        tk.Button(t_bar, text="✅ Validate", command=self.validate, 
-                 bg="#2ECC71", fg="white", font=("Segoe UI", 9, "bold")).pack(side='right')
+        self.btn_validate = tk.Button(t_bar, text="✅ Validate", command=self.validate, 
+                 bg="#2ECC71", fg="white", font=("Segoe UI", 9, "bold"))
+        self.btn_validate.pack(side='right')
         
         tk.Button(t_bar, text="📈 Data Quality", command=self.show_data_quality, 
                  bg="#9B59B6", fg="white").pack(side='right', padx=5)
 
-        h_frame = tk.Frame(f, bg="#2C3E50", height=30)
-        h_frame.pack(fill='x')
-        
         self.col_cfg = [
             ("Unit", 15), ("Ledger Name", 35), ("Amt CY", 12), ("Amt PY", 12), 
-            ("Group Head", 25), ("Sub Group", 20), ("Fund", 12), ("X", 5)
+            ("Group Head", 25), ("Sub Group", 20), ("Fund", 12)
         ]
         
-        for i, (t, w) in enumerate(self.col_cfg):
-            tk.Label(h_frame, text=t, fg="white", bg="#2C3E50", 
-                    font=("Segoe UI", 9, "bold"), width=w).grid(row=0, column=i, padx=1)
-
-        # Create scrollable frame
-        canvas_frame = tk.Frame(f)
-        canvas_frame.pack(fill='both', expand=True)
+        # One Treeview holds every row; cells are edited through a single overlay widget
+        tree_frame = tk.Frame(f)
+        tree_frame.pack(fill='both', expand=True)
         
-        canvas = tk.Canvas(canvas_frame, bg="white")
-        sb = ttk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
-        self.scroll_frame = tk.Frame(canvas, bg="white")
+        keys = [key for key, _ in MAP_FIELDS]
+        self.map_tree = ttk.Treeview(tree_frame, columns=keys, show='headings', selectmode='extended')
+        for key, (t, w) in zip(keys, self.col_cfg):
+            self.map_tree.heading(key, text=t)
+            self.map_tree.column(key, width=w * 8, anchor='e' if key in ('cy', 'py') else 'w')
+        self.map_tree.tag_configure('even', background="#f8f9fa")
         
-        self.scroll_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
-        canvas.configure(yscrollcommand=sb.set)
+        sb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.map_tree.yview)
+        self.map_tree.configure(yscrollcommand=sb.set)
         
-        canvas.pack(side="left", fill="both", expand=True)
+        self.map_tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
         
-        self.map_rows = []
-
-    def add_map_row(self, data=None):
-        r = len(self.map_rows)
-        bg = "#f8f9fa" if r%2==0 else "white"
-        fr = tk.Frame(self.scroll_frame, bg=bg)
-        fr.pack(fill='x', pady=1)
+        self.map_tree.bind("<Double-1>", self._edit_map_cell)
+        self.map_tree.bind("<Delete>", lambda e: self.remove_map_row())
+        self._map_editor = None
         
+        self._reset_map_cols()
+
+    def _map_values(self, data):
+        """Grid values for one TB record, keyed like MAP_FIELDS; amounts parsed to float"""
         vals = {
-            'unit': data.get('Unit', '') if data else '',
-            'name': data.get('Ledger Name', '') if data else '',
-            'cy': data.get('Amount_CY', 0) if data else 0,
-            'py': data.get('Amount_PY', 0) if data else 0,
-            'grp': data.get('Group_Head', '') if data else '',
-            'sub': data.get('Sub_Group', '') if data else '',
-            'fund': data.get('Fund_Type', 'General') if data else 'General'
+            'unit': data.get('Unit', ''),
+            'name': data.get('Ledger Name', ''),
+            'cy': data.get('Amount_CY', 0),
+            'py': data.get('Amount_PY', 0),
+            'grp': data.get('Group_Head', ''),
+            'sub': data.get('Sub_Group', ''),
+            'fund': data.get('Fund_Type', 'General')
         }
         
-        w = {}
-        units = self.get_unit_list()
-        w['unit'] = ttk.Combobox(fr, values=units, width=17, state="readonly")
-        w['unit'].set(vals['unit'] or (units[0] if units else ''))
-        w['unit'].grid(row=0, column=0, padx=1)
-        
-        w['name'] = tk.Entry(fr, width=47)
-        w['name'].insert(0, vals['name'])
-        w['name'].grid(row=0, column=1, padx=1)
-        
-        w['cy'] = tk.Entry(fr, width=14, justify='right')
-        w['cy'].insert(0, vals['cy'])
-        w['cy'].grid(row=0, column=2, padx=1)
+        if not vals['unit']:
+            units = self.get_unit_list()
+            vals['unit'] = units[0] if units else ''
         
-        w['py'] = tk.Entry(fr, width=14, justify='right')
-        w['py'].insert(0, vals['py'])
-        w['py'].grid(row=0, column=3, padx=1)
-        
-        w['grp'] = ttk.Combobox(fr, values=ALL_GROUPS, width=32, state="readonly")
-        w['grp'].set(vals['grp'])
-        w['grp'].grid(row=0, column=4, padx=1)
-        
-        w['sub'] = ttk.Combobox(fr, width=25)
-        w['sub'].set(vals['sub'])
-        w['sub'].grid(row=0, column=5, padx=1)
-        
-        def on_grp(e):
-            w['sub']['values'] = SUB_GROUP_MAPPING.get(w['grp'].get(), [])
-        
-        w['grp'].bind("<<ComboboxSelected>>", on_grp)
-        if vals['grp']: 
-            on_grp(None)
-        
-        w['fund'] = ttk.Combobox(fr, values=FUND_TYPES, width=14, state="readonly")
-        w['fund'].set(vals['fund'])
-        w['fund'].grid(row=0, column=6, padx=1)
-        
-        tk.Button(fr, text="×", fg="red", relief='flat', bg=bg, 
-                 command=lambda: self.remove_map_row(fr)).grid(row=0, column=7)
-        
-        self.map_rows.append({'frame': fr, 'w': w})
-        self.activity_tracker.track_activity('add_row', {'row': r})
+        return {key: DataManager._safe_float(v) if key in AMOUNT_KEYS else str(v) for key, v in vals.items()}
+
+    def _insert_map_rows(self, records):
+        """Append records to map_cols and the grid in one pass (iid = buffer slot)"""
+        cols = self.map_cols
+        unit = self.unit_var.get()
+        insert = self.map_tree.insert
+        hidden = []
+        
+        for slot, data in enumerate(records, len(self.map_live)):
+            vals = self._map_values(data)
+            for key, v in vals.items():
+                cols[key].append(v)
+            self._by_unit.setdefault(vals['unit'], []).append(slot)
+            
+            iid = str(slot)
+            insert("", "end", iid=iid, tags=('even',) if slot % 2 == 0 else (),
+                   values=tuple(f"{v:,.2f}" if key in AMOUNT_KEYS else v for key, v in vals.items()))
+            if unit != "Consolidated" and vals['unit'] != unit:
+                hidden.append(iid)
+        
+        self.map_live.extend([True] * len(records))
+        if hidden:
+            self.map_tree.detach(*hidden)
+        self._invalidate_map_cache()
+
+    def add_map_row(self, data=None):
+        slot = len(self.map_live)
+        self._insert_map_rows([data or {}])
+        self.activity_tracker.track_activity('add_row', {'row': slot})
+
+    def _edit_map_cell(self, event):
+        """Overlay an editor on the double-clicked cell and write the value back on commit"""
+        tree = self.map_tree
+        iid = tree.identify_row(event.y)
+        col = tree.identify_column(event.x)
+        if tree.identify_region(event.x, event.y) != 'cell' or not iid:
+            return
+        bbox = tree.bbox(iid, col)
+        if not bbox:
+            return
+        if self._map_editor is not None:
+            self._map_editor.destroy()
+        
+        slot = int(iid)
+        key = MAP_FIELDS[int(col.replace('#', '')) - 1][0]
+        current = self.map_cols[key][slot]
+        if key in AMOUNT_KEYS:
+            # Amounts are held as floats; edit them in the grid's 1,234.50 form, unless that would round
+            current = f"{current:,.2f}" if round(current, 2) == current else f"{current:,}"
+        var = tk.StringVar(value=current)
+        
+        if key == 'unit':
+            e = ttk.Combobox(tree, textvariable=var, values=self.get_unit_list(), state="readonly")
+        elif key == 'grp':
+            e = ttk.Combobox(tree, textvariable=var, values=self._all_groups_tuple, state="readonly")
+        elif key == 'sub':
+            e = ttk.Combobox(tree, textvariable=var, 
+                             values=self._sub_cache.get(self.map_cols['grp'][slot], ()))
+        elif key == 'fund':
+            e = ttk.Combobox(tree, textvariable=var, values=self._fund_types_tuple, state="readonly")
+        else:
+            e = ttk.Entry(tree, textvariable=var, justify='right' if key in ('cy', 'py') else 'left')
+        
+        x, y, w, h = bbox
+        e.place(x=x, y=y, width=w, height=h)
+        e.focus_set()
+        self._map_editor = e
+        
+        def close():
+            if self._map_editor is e:
+                self._map_editor = None
+            e.destroy()
+        
+        def save(x=None):
+            if e.winfo_exists():
+                value = var.get()
+                close()
+                if key in AMOUNT_KEYS:
+                    # Compare as numbers so an unchanged amount does not invalidate the caches
+                    value = DataManager._safe_float(value)
+                if value != self.map_cols[key][slot]:
+                    self._set_map_cell(slot, key, value)
+        
+        def focus_out(x=None):
+            # An open combobox dropdown takes focus; only commit once focus leaves the editor
+            def check():
+                if e.winfo_exists() and not str(e.tk.call('focus')).startswith(str(e)):
+                    save()
+            e.after(1, check)
+        
+        e.bind('<Return>', save)
+        e.bind('<Escape>', lambda x: close())
+        e.bind('<FocusOut>', focus_out)
+        e.bind('<<ComboboxSelected>>', save)
 
-    def remove_map_row(self, frame):
-        """Remove a mapping row"""
-        for i, row in enumerate(self.map_rows):
-            if row['frame'] == frame:
-                self.map_rows.pop(i)
-                frame.destroy()
-                break
+    def remove_map_row(self):
+        """Remove the selected mapping rows"""
+        for iid in self.map_tree.selection():
+            slot = int(iid)
+            self.map_live[slot] = False
+            self._by_unit[self.map_cols['unit'][slot]].remove(slot)
+            self.map_tree.delete(iid)
+        self._invalidate_map_cache()
 
     def clear_mapping(self):
         """Clear all mapping rows"""
         if messagebox.askyesno("Confirm", "Clear all mapping data?"):
-            for row in self.map_rows[:]:
-                if row['frame'].winfo_exists():
-                    row['frame'].destroy()
-            self.map_rows = []
+            # Filtered-out rows are detached, not children of the root, so delete by slot
+            live = [str(i) for i, alive in enumerate(self.map_live) if alive]
+            if live:
+                self.map_tree.delete(*live)
+            self._reset_map_cols()
             self.is_validated = False
             self.lbl_valid.config(text="⚠️ Not Validated", bg="#E74C3C")
             self.btn_gen.config(state="disabled")
 
+    def _schedule_filter(self):
+        """Debounce filter_by_unit so stepping through the unit list repaints once"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(50, self.filter_by_unit)
+
     def filter_by_unit(self):
         """Filter rows by selected unit"""
+        self._filter_job = None
         unit = self.unit_var.get()
-        for row in self.map_rows:
-            if row['frame'].winfo_exists():
-                row_unit = row['w']['unit'].get()
-                if unit == "Consolidated" or row_unit == unit:
-                    row['frame'].pack(fill='x', pady=1)
-                else:
-                    row['frame'].pack_forget()
+        if unit == "Consolidated":
+            slots = [i for i, alive in enumerate(self.map_live) if alive]
+        else:
+            slots = sorted(self._by_unit.get(unit, ()))
+        # set_children detaches every row not listed, so this is one Tk call
+        self.map_tree.set_children("", *map(str, slots))
 
     def show_data_quality(self):
         """Show data quality analysis"""
@@ -457,21 +703,8 @@ class NPOApp:
     def get_unit_list(self):
         """Get list of units from organization data"""
         units_str = self.org_vars.get('Units', '').get() if self.org_vars.get('Units') else "Main Unit"
-        units = [u.strip() for u in units_str.split(',') if u.strip()]
-        
-        # Always include "Consolidated" and "Main Unit"
-        all_units = ["Consolidated"]
-        all_units.extend(units)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_units = []
-        for unit in all_units:
-            if unit not in seen:
-                seen.add(unit)
-                unique_units.append(unit)
-        
-        return unique_units
+        # Parsed once per distinct field text, so no invalidation is needed when it is edited
+        return list(_parse_units(units_str))
 
     def update_units(self):
         """Update unit dropdowns with current unit list"""
@@ -508,42 +741,73 @@ class NPOApp:
             # Clear existing rows
             self.clear_mapping()
             
-            # Add new rows
-            for item in data:
-                self.add_map_row(item)
-            
-            # Update units from loaded data
-            units = set(row.get('Unit', 'Main Unit') for row in data)
-            units_str = ', '.join(units)
-            if 'Units' in self.org_vars:
-                self.org_vars['Units'].delete(0, tk.END)
-                self.org_vars['Units'].insert(0, units_str)
-            
-            # Refresh unit dropdowns
-            self.update_units()
-            
-            # Log the activity
-            self.audit_logger.log_generation(
-                self.org_vars.get('Name', tk.StringVar(value='Unknown')).get(),
-                filename,
-                {'rows_loaded': len(data)}
-            )
-            
-            self.activity_tracker.track_activity('load_csv', {
-                'filename': filename,
-                'rows': len(data)
-            })
-            
-            messagebox.showinfo("Success", f"Loaded {len(data)} records from {filename}")
+            # Insert in batches from the event loop so the window stays live and shows progress;
+            # columns stay hidden until the last batch so the grid is laid out once
+            # Import, Validate and Generate stay disabled until the last batch is in (see _end_load)
+            self.map_tree.configure(displaycolumns=())
+            self.progress_bar.configure(mode='determinate', maximum=len(data), value=0)
+            for btn in (self.btn_import, self.btn_validate, self.btn_gen):
+                btn.config(state="disabled")
+            self.update_status(f"Loading {len(data)} records...")
+            self._load_job = self.root.after(0, self._load_batch, filename, data, 0)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file: {str(e)}")
             self.audit_logger.log_error("file_load", str(e), {'filename': filename})
 
-    def setup_unit_analysis_tab(self):
+    def _load_batch(self, filename, data, start):
+        """Insert one batch of loaded records, then schedule the next or finish the import"""
+        end = min(start + MAP_LOAD_BATCH, len(data))
+        try:
+            self._insert_map_rows(data[start:end])
+            if end < len(data):
+                self.progress_bar['value'] = end
+                self._load_job = self.root.after(0, self._load_batch, filename, data, end)
+                return
+            self._end_load()
+            self._finish_load(filename, data)
+        except Exception as e:
+            self._end_load()
+            messagebox.showerror("Error", f"Failed to load file: {str(e)}")
+            self.audit_logger.log_error("file_load", str(e), {'filename': filename})
+
+    def _end_load(self):
+        """Show the grid columns again, return the progress bar to idle and re-enable the controls"""
+        self._load_job = None
+        self.map_tree.configure(displaycolumns='#all')
+        self.progress_bar.configure(mode='indeterminate', value=0)
+        self.btn_import.config(state="normal")
+        self.btn_validate.config(state="normal")
+        self.btn_gen.config(state="normal" if self.is_validated else "disabled")
+        self.update_status("Ready")
+
+    def _finish_load(self, filename, data):
+        # Update units from loaded data
+        units = set(row.get('Unit', 'Main Unit') for row in data)
+        units_str = ', '.join(units)
+        if 'Units' in self.org_vars:
+            self.org_vars['Units'].delete(0, tk.END)
+            self.org_vars['Units'].insert(0, units_str)
+        
+        # Refresh unit dropdowns
+        self.update_units()
+        
+        # Log the activity
+        self.audit_logger.log_generation(
+            self.org_vars.get('Name', tk.StringVar(value='Unknown')).get(),
+            filename,
+            {'rows_loaded': len(data)}
+        )
+        
+        self.activity_tracker.track_activity('load_csv', {
+            'filename': filename,
+            'rows': len(data)
+        })
+        
+        messagebox.showinfo("Success", f"Loaded {len(data)} records from {filename}")
+
+    def setup_unit_analysis_tab(self, f):
         """New tab for unit-wise analysis"""
-        f = ttk.Frame(self.notebook)
-        self.notebook.add(f, text=" 📈 Unit Analysis ")
         
         # Control panel
         control_frame = tk.Frame(f, bg="#ECF0F1", padx=20, pady=10)
@@ -604,19 +868,12 @@ class NPOApp:
             self.unit_tree.insert("", "end", values=("No data available", "", ""))
             return
         
-        # Calculate metrics
-        income = sum(r.get('Amount_CY', 0) for r in data 
-                    if r.get('Group_Head') in PL_INCOME)
-        expenses = sum(r.get('Amount_CY', 0) for r in data 
-                      if r.get('Group_Head') in PL_EXPENSE)
+        # Calculate metrics (unit and consolidated totals are memoized until the mapping changes)
+        income, expenses, prog_exp = self._unit_totals(unit)
         surplus = income - expenses
         
         # Get consolidated totals for comparison
-        consolidated = self.collect_mapping_data("Consolidated")
-        total_income = sum(r.get('Amount_CY', 0) for r in consolidated 
-                          if r.get('Group_Head') in PL_INCOME)
-        total_expenses = sum(r.get('Amount_CY', 0) for r in consolidated 
-                            if r.get('Group_Head') in PL_EXPENSE)
+        total_income, total_expenses, _ = self._unit_totals("Consolidated")
         
         # Insert metrics
         self.unit_tree.insert("", "end", values=("INCOME", f"₹{income:,.2f}", 
@@ -626,8 +883,6 @@ class NPOApp:
         self.unit_tree.insert("", "end", values=("SURPLUS/DEFICIT", f"₹{surplus:,.2f}", ""))
         
         # Program expenses ratio
-        prog_exp = sum(r.get('Amount_CY', 0) for r in data 
-                      if r.get('Group_Head') == 'Programme Expenses')
         prog_ratio = (prog_exp/expenses*100) if expenses > 0 else 0
         self.unit_tree.insert("", "end", values=("Program Expense Ratio", 
                                                f"{prog_ratio:.1f}%", ""))
@@ -662,18 +917,11 @@ class NPOApp:
         
         tree.pack(fill='both', expand=True, padx=20, pady=20)
         
-        # Calculate totals
-        consolidated = self.collect_mapping_data("Consolidated")
-        total_income = sum(r.get('Amount_CY', 0) for r in consolidated 
-                          if r.get('Group_Head') in PL_INCOME)
+        total_income, total_expenses, _ = self._unit_totals("Consolidated")
         
         # Add data for each unit
         for unit in units:
-            data = self.collect_mapping_data(unit)
-            income = sum(r.get('Amount_CY', 0) for r in data 
-                        if r.get('Group_Head') in PL_INCOME)
-            expenses = sum(r.get('Amount_CY', 0) for r in data 
-                          if r.get('Group_Head') in PL_EXPENSE)
+            income, expenses, _ = self._unit_totals(unit)
             surplus = income - expenses
             income_pct = (income/total_income*100) if total_income > 0 else 0
             
@@ -686,8 +934,6 @@ class NPOApp:
             ))
         
         # Add total row
-        total_expenses = sum(r.get('Amount_CY', 0) for r in consolidated 
-                            if r.get('Group_Head') in PL_EXPENSE)
         total_surplus = total_income - total_expenses
         
         tree.insert("", "end", values=(
@@ -698,10 +944,8 @@ class NPOApp:
             "100.0%"
         ))
 
-    def setup_compliance_tab(self):
+    def setup_compliance_tab(self, f):
         """Tab for compliance checking"""
-        f = ttk.Frame(self.notebook)
-        self.notebook.add(f, text=" ✅ Compliance ")
         
         # Options frame
         options_frame = tk.Frame(f, padx=20, pady=10)
@@ -743,70 +987,59 @@ class NPOApp:
 
     def run_compliance_check(self):
         """Run comprehensive compliance check"""
-        data = self.collect_mapping_data("Consolidated")
-        if not data:
+        # A DataFrame takes the compliance calculator's vectorized path instead of its per-row loop
+        data = self._mapping_frame("Consolidated")
+        if data.empty:
             messagebox.showwarning("Warning", "No data available for compliance check")
             return
         
         # Clear text
         self.compliance_text.delete(1.0, tk.END)
         
-        # Calculate totals
-        income_total = sum(r.get('Amount_CY', 0) for r in data 
-                          if r.get('Group_Head') in PL_INCOME)
-        expense_total = sum(r.get('Amount_CY', 0) for r in data 
-                           if r.get('Group_Head') in PL_EXPENSE)
-        
         # Get PPE data
-        ppe_data = []
-        for i in self.ppe_tree.get_children():
-            values = self.ppe_tree.item(i, "values")
-            if len(values) >= 7:
-                ppe_data.append({
-                    'Asset Name': values[0],
-                    'Additions': values[2]
-                })
-        
-        # Generate compliance report
+        ppe_data = [{'Asset Name': r['Asset Name'], 'Additions': r['Additions']}
+                    for r in self._ppe_rows.values()]
+        
+        # Generate compliance report with the income/expense totals from the shared category tally
+        income, expenses, _ = self._unit_totals("Consolidated")
         report = ComplianceCalculator.generate_compliance_report(
-            data, income_total, expense_total, ppe_data
-        )
+            data, income, expenses, ppe_data=ppe_data)
         
-        # Display report
-        self.compliance_text.insert(tk.END, "="*60 + "\n")
-        self.compliance_text.insert(tk.END, "COMPLIANCE STATUS REPORT\n")
-        self.compliance_text.insert(tk.END, "="*60 + "\n\n")
+        # Build the report text, then hand it to the widget in one insert
+        out = [REPORT_HEADER]
         
         # Section 11
         sec11 = report.get('section_11', {})
-        self.compliance_text.insert(tk.END, "INCOME TAX ACT (SECTION 11)\n")
-        self.compliance_text.insert(tk.END, "-"*40 + "\n")
-        self.compliance_text.insert(tk.END, f"Total Income: ₹{sec11.get('total_income',0):,.2f}\n")
-        self.compliance_text.insert(tk.END, f"Total Application: ₹{sec11.get('total_application',0):,.2f}\n")
-        self.compliance_text.insert(tk.END, f"Required (85%): ₹{sec11.get('required_application',0):,.2f}\n")
+        out.append("INCOME TAX ACT (SECTION 11)\n")
+        out.append(SECTION_RULE)
+        out.append(f"Total Income: ₹{sec11.get('total_income',0):,.2f}\n")
+        out.append(f"Total Application: ₹{sec11.get('total_application',0):,.2f}\n")
+        out.append(f"Required (85%): ₹{sec11.get('required_application',0):,.2f}\n")
         
         if sec11.get('compliance_85_percent'):
-            self.compliance_text.insert(tk.END, "✓ COMPLIANT with 85% application requirement\n")
+            out.append("✓ COMPLIANT with 85% application requirement\n")
         else:
-            self.compliance_text.insert(tk.END, f"⚠️ SHORTFALL: ₹{abs(sec11.get('shortfall_excess',0)):,.2f}\n")
+            out.append(f"⚠️ SHORTFALL: ₹{abs(sec11.get('shortfall_excess',0)):,.2f}\n")
         
-        self.compliance_text.insert(tk.END, "\n")
+        out.append("\n")
         
         # Gujarat Compliance
         guj = report.get('gujarat_compliance', {})
-        self.compliance_text.insert(tk.END, "GUJARAT TRUST ACT\n")
-        self.compliance_text.insert(tk.END, "-"*40 + "\n")
+        out.append("GUJARAT TRUST ACT\n")
+        out.append(SECTION_RULE)
         
         if guj.get('issues'):
-            self.compliance_text.insert(tk.END, "⚠️ Issues found:\n")
+            out.append("⚠️ Issues found:\n")
             for issue in guj.get('issues', [])[:3]:
-                self.compliance_text.insert(tk.END, f"  • {issue}\n")
+                out.append(f"  • {issue}\n")
         else:
-            self.compliance_text.insert(tk.END, "✓ All requirements met\n")
+            out.append("✓ All requirements met\n")
+        
+        out.append(f"Forms required: {', '.join(guj.get('forms_required', []))}\n")
         
-        self.compliance_text.insert(tk.END, f"Forms required: {', '.join(guj.get('forms_required', []))}\n")
+        out.append("\n")
         
-        self.compliance_text.insert(tk.END, "\n")
+        self.compliance_text.insert(tk.END, ''.join(out))
         
         # Log the check
         self.audit_logger.log_compliance_check("full", report)
@@ -818,7 +1051,10 @@ class NPOApp:
             return
         
         ay = self.org_vars.get('AY', '').get() if self.org_vars.get('AY') else '2024-25'
-        form = ITFormsGenerator.prepare_form_10b(data, ay)
+        # Dropped with the other mapping caches, so reopening on an unchanged TB reuses the form
+        form = self._form10b_cache.get(ay)
+        if form is None:
+            form = self._form10b_cache[ay] = ITFormsGenerator.prepare_form_10b(data, ay)
         
         # Show form preview
         preview_window = tk.Toplevel(self.root)
@@ -832,14 +1068,12 @@ class NPOApp:
                                        width=70, height=20)
         text.pack(fill='both', expand=True, padx=20, pady=10)
         
-        text.insert(tk.END, f"Form: {form['form_name']}\n")
-        text.insert(tk.END, f"Assessment Year: {form['assessment_year']}\n")
-        text.insert(tk.END, "\nSections:\n")
-        
-        for section, title in form['sections'].items():
-            text.insert(tk.END, f"{section}. {title}\n")
-        
-        text.insert(tk.END, "\nNote: Complete form will be generated in Excel.")
+        text.insert(tk.END, 
+                    f"Form: {form['form_name']}\n"
+                    f"Assessment Year: {form['assessment_year']}\n"
+                    "\nSections:\n" +
+                    ''.join(f"{section}. {title}\n" for section, title in form['sections'].items()) +
+                    "\nNote: Complete form will be generated in Excel.")
 
     def show_compliance_checklist(self):
         """Show compliance checklist"""
@@ -866,10 +1100,8 @@ class NPOApp:
                     frame.check_vars = []
                 frame.check_vars.append((var, item))
 
-    def setup_templates_tab(self):
+    def setup_templates_tab(self, f):
         """Tab for template management"""
-        f = ttk.Frame(self.notebook)
-        self.notebook.add(f, text=" 📁 Templates ")
         
         # Left panel - Template list
         left_frame = tk.Frame(f)
@@ -937,10 +1169,11 @@ class NPOApp:
         self.template_listbox.delete(0, tk.END)
         templates = self.template_manager.list_templates()
         
-        for template in templates:
-            name = template.get('name', 'Unnamed')
-            default = " (Default)" if template.get('is_default') else ""
-            self.template_listbox.insert(tk.END, f"{name}{default}")
+        # Listbox.insert takes every entry in one call
+        self.template_listbox.insert(tk.END, *(
+            f"{template.get('name', 'Unnamed')}{' (Default)' if template.get('is_default') else ''}"
+            for template in templates
+        ))
 
     def save_as_template(self):
         """Save current configuration as template"""
@@ -981,21 +1214,20 @@ class NPOApp:
         
         template_name = self.template_listbox.get(selection[0]).split(" (")[0]
         
-        success, template = self.template_manager.load_template(template_name)
+        # Only read here and in apply_template, so the cached template is used without a copy
+        success, template = self.template_manager.load_template(template_name, shared=True)
         if not success:
             messagebox.showerror("Error", template)  # template contains error message
             return
         
         # Show template info
         self.template_info_text.delete(1.0, tk.END)
-        self.template_info_text.insert(tk.END, f"Template: {template['name']}\n")
-        self.template_info_text.insert(tk.END, f"Created: {template['created_at']}\n")
-        self.template_info_text.insert(tk.END, f"Default: {'Yes' if template['is_default'] else 'No'}\n")
-        self.template_info_text.insert(tk.END, "\nConfiguration:\n")
-        
-        import json
         self.template_info_text.insert(tk.END, 
-                                      json.dumps(template['config'], indent=2))
+                                      f"Template: {template['name']}\n"
+                                      f"Created: {template['created_at']}\n"
+                                      f"Default: {'Yes' if template['is_default'] else 'No'}\n"
+                                      "\nConfiguration:\n" +
+                                      self.template_manager.config_text(template_name))
         
         # Ask if user wants to apply
         if messagebox.askyesno("Load Template", 
@@ -1047,28 +1279,54 @@ class NPOApp:
         lf1 = tk.LabelFrame(f, text="Fixed Assets Schedule", padx=10, pady=10)
         lf1.pack(fill='both', expand=True, padx=10, pady=5)
         c = ["Asset Name", "Gross_Op", "Additions", "Deletions", "Dep_Op", "Dep_Year", "Dep_Del"]
-        self.ppe_tree = self._create_tree(lf1, c)
+        # Rows are mirrored as {iid: {column: value}} so readers need no per-item Tk calls
+        self._ppe_rows = {}
+        self.ppe_tree = self._create_tree(lf1, c, self._ppe_rows)
         btn_frame = tk.Frame(lf1)
         btn_frame.pack(fill='x', pady=5)
         tk.Button(btn_frame, text="Add Asset", 
-                 command=lambda: self.ppe_tree.insert('', 'end', values=("New Asset",0,0,0,0,0,0))).pack(side='left')
+                 command=self.add_ppe_row).pack(side='left')
         tk.Button(btn_frame, text="Delete Selected", 
-                 command=lambda: self.ppe_tree.delete(*self.ppe_tree.selection())).pack(side='left', padx=5)
+                 command=self.delete_ppe_rows).pack(side='left', padx=5)
         
         # Funds
         lf2 = tk.LabelFrame(f, text="Funds Movement", padx=10, pady=10)
         lf2.pack(fill='both', expand=True, padx=10, pady=5)
         fc = ["Fund Name", "Type", "Opening", "Received", "Utilized"]
-        self.fund_tree = self._create_tree(lf2, fc)
+        self._fund_rows = {}
+        self.fund_tree = self._create_tree(lf2, fc, self._fund_rows)
         btn_frame2 = tk.Frame(lf2)
         btn_frame2.pack(fill='x', pady=5)
         tk.Button(btn_frame2, text="Add Fund", 
-                 command=lambda: self.fund_tree.insert('', 'end', values=("New Fund","Restricted",0,0,0))).pack(side='left')
+                 command=self.add_fund_row).pack(side='left')
         tk.Button(btn_frame2, text="Delete Selected", 
-                 command=lambda: self.fund_tree.delete(*self.fund_tree.selection())).pack(side='left', padx=5)
+                 command=self.delete_fund_rows).pack(side='left', padx=5)
+
+    def add_ppe_row(self):
+        self._add_tree_row(self.ppe_tree, self._ppe_rows, DEFAULT_PPE_ROW)
+
+    def delete_ppe_rows(self):
+        self._delete_tree_rows(self.ppe_tree, self._ppe_rows)
+
+    def add_fund_row(self):
+        self._add_tree_row(self.fund_tree, self._fund_rows, DEFAULT_FUND_ROW)
+
+    def delete_fund_rows(self):
+        self._delete_tree_rows(self.fund_tree, self._fund_rows)
 
-    def setup_10b_tab(self):
-        f = ttk.Frame(self.notebook); self.notebook.add(f, text=" 📋 10B/BB Calculator ")
+    def _add_tree_row(self, tree, rows, values):
+        """Insert a schedule row and record it in the tree's backing dict"""
+        iid = tree.insert('', 'end', values=values)
+        rows[iid] = dict(zip(tree['columns'], values))
+
+    def _delete_tree_rows(self, tree, rows):
+        """Delete the selected schedule rows from the tree and its backing dict"""
+        selection = tree.selection()
+        for iid in selection:
+            rows.pop(iid, None)
+        tree.delete(*selection)
+
+    def setup_10b_tab(self, f):
         mf = tk.Frame(f, bg="white", padx=30, pady=30); mf.pack(fill='both', expand=True)
         tk.Label(mf, text="Draft Computation of Income (Sec 11)", 
                 font=("Segoe UI", 16, "bold"), bg="white", fg="#2C3E50").pack(pady=15)
@@ -1107,8 +1365,19 @@ class NPOApp:
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
         )
         if filename:
-            with open(filename, 'w') as f:
-                f.write(self.txt_pol.get("1.0", tk.END))
+            # Encode once (UTF-8 so symbols like ₹ survive) and hand the bytes straight to the OS;
+            # the descriptor is binary, so write platform line endings as text mode used to
+            text = self.txt_pol.get("1.0", tk.END)
+            if os.linesep != '\n':
+                text = text.replace('\n', os.linesep)
+            view = memoryview(text.encode('utf-8'))
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+            try:
+                # os.write may accept only part of the buffer; slicing the view does not copy
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
             messagebox.showinfo("Success", f"Policies saved to {filename}")
 
     def load_policies(self):
@@ -1117,10 +1386,11 @@ class NPOApp:
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
         )
         if filename:
-            with open(filename, 'r') as f:
-                content = f.read()
             self.txt_pol.delete("1.0", tk.END)
-            self.txt_pol.insert(tk.END, content)
+            # Stream into the widget in 64 KiB blocks instead of holding the whole file as one string
+            with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+                for chunk in iter(lambda: f.read(1 << 16), ''):
+                    self.txt_pol.insert(tk.END, chunk)
             messagebox.showinfo("Success", f"Policies loaded from {filename}")
 
     def reset_policies(self):
@@ -1129,7 +1399,7 @@ class NPOApp:
             self.txt_pol.delete("1.0", tk.END)
             self.txt_pol.insert(tk.END, DEFAULT_POLICIES)
 
-    def _create_tree(self, p, c):
+    def _create_tree(self, p, c, rows=None):
         t = ttk.Treeview(p, columns=c, show='headings', height=8)
         for col in c: 
             t.heading(col, text=col)
@@ -1155,6 +1425,8 @@ class NPOApp:
                 vals = list(t.item(item, 'values'))
                 vals[col_idx] = e.get()
                 t.item(item, values=vals)
+                if rows is not None:
+                    rows[item][c[col_idx]] = vals[col_idx]
                 top.destroy()
             
             top.bind('<Return>', save)
@@ -1164,24 +1436,16 @@ class NPOApp:
         return t
 
     def refresh_10b(self):
-        inc = 0; rev_exp = 0; cap_exp = 0
         u = self.unit_var.get()
         
-        # Revenue Exp & Income
-        data = self.collect_mapping_data(u)
-        for r in data:
-            try:
-                v = float(r.get('Amount_CY', 0))
-                g = r.get('Group_Head', '')
-                if g in PL_INCOME: inc += v
-                if g in PL_EXPENSE and g != 'Depreciation': rev_exp += v
-            except: pass
+        # Revenue Exp (depreciation is its own category, so excluded) & Income in one pass
+        tally = self._group_tally(u)
+        inc = float(tally[2])
+        rev_exp = float(tally[3] + tally[6])
         
         # Capital Exp
-        for child in self.ppe_tree.get_children():
-            try: 
-                cap_exp += float(self.ppe_tree.item(child, 'values')[2])
-            except: pass
+        additions = pd.Series([r['Additions'] for r in self._ppe_rows.values()], dtype=object)
+        cap_exp = float(DataManager._safe_float_series(additions).sum())
             
         ded = inc * 0.15
         tot_app = rev_exp + cap_exp
@@ -1196,14 +1460,14 @@ class NPOApp:
             ("G. Compliance with 85% Rule", "✓ Yes" if tot_app >= inc*0.85 else "✗ No")
         ]
         
-        for i in self.calc_tree.get_children(): 
-            self.calc_tree.delete(i)
+        # Format the amounts up front so the insert loop only pushes ready rows
+        rows = [(label, "₹" + format(v, ',.2f') if isinstance(v, (int, float)) else v)
+                for label, v in rows]
+        
+        self.calc_tree.delete(*self.calc_tree.get_children())
         
         for r in rows:
-            if isinstance(r[1], (int, float)):
-                self.calc_tree.insert('', 'end', values=(r[0], f"₹{r[1]:,.2f}"))
-            else:
-                self.calc_tree.insert('', 'end', values=(r[0], r[1]))
+            self.calc_tree.insert('', 'end', values=r)
 
     def validate(self):
         """Validate the trial balance"""
@@ -1216,21 +1480,10 @@ class NPOApp:
                 messagebox.showerror("Validation Error", message)
                 return
             
-            # Perform accounting validation
-            assets, liab, inc, exp = 0, 0, 0, 0
-            u = self.unit_var.get()
-            
-            for r in data:
-                try:
-                    v = float(r.get('Amount_CY', 0))
-                    g = r.get('Group_Head', '')
-                    
-                    if g in BS_ASSETS: assets += v
-                    elif g in BS_LIABILITIES: liab += v
-                    elif g in PL_INCOME: inc += v
-                    elif g in PL_EXPENSE: exp += v
-                except ValueError:
-                    pass
+            # Perform accounting validation: one tally over category codes
+            tally = self._group_tally(self.unit_var.get())
+            assets, liab = float(tally[0]), float(tally[1])
+            inc, exp, _ = self._unit_totals(self.unit_var.get())
             
             diff = assets - (liab + (inc - exp))
             
@@ -1241,7 +1494,7 @@ class NPOApp:
                 
                 # Log successful validation
                 self.audit_logger.log_validation(
-                    self.current_data_hash,
+                    self._mapping_hash(),
                     (True, "Validation successful"),
                     self.unit_var.get()
                 )